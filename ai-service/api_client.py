@@ -10,9 +10,11 @@ class APIClient:
     def __init__(self, base_url):
         """Initialize API client"""
         self.base_url = base_url.rstrip('/')
+        self.timeout = 10
         self.session = requests.Session()
+        # Content-Type is set per request: JSON for single events,
+        # multipart for batches carrying binary images
         self.session.headers.update({
-            'Content-Type': 'application/json',
             'User-Agent': 'SurveillanceSystem/1.0'
         })
         
@@ -26,7 +28,7 @@ class APIClient:
             
             # Send POST request
             url = f"{self.base_url}/api/events/from-python"
-            response = self.session.post(url, json=event_data, timeout=10)
+            response = self.session.post(url, json=event_data, timeout=self.timeout)
             
             if response.status_code == 200:
                 logger.info(f"✅ Event sent successfully: {event_data['eventType']}")
@@ -43,6 +45,66 @@ class APIClient:
             logger.error(f"❌ Error sending event: {e}")
             return False
     
+    def send_events(self, events):
+        """Send a batch of (event_data, jpeg_bytes) pairs in one multipart request
+
+        Returns False only when the batch should be retried later.
+        """
+        try:
+            payload = []
+            files = []
+            for index, (event_data, image_bytes) in enumerate(events):
+                event_data = dict(event_data)
+                if image_bytes:
+                    # Raw JPEG parts instead of base64 strings inside the JSON
+                    field = f"image_{index}"
+                    event_data['imageField'] = field
+                    files.append((field, (f"{field}.jpg", image_bytes, 'image/jpeg')))
+                payload.append(event_data)
+            
+            # The event list always travels as the first multipart part
+            files.insert(0, ('events', (None, json.dumps(payload), 'application/json')))
+            
+            url = f"{self.base_url}/api/events/from-python/batch"
+            response = self.session.post(url, files=files, timeout=self.timeout)
+            
+            if response.status_code == 200:
+                logger.info(f"✅ Batch of {len(payload)} events sent successfully")
+                return True
+            elif 400 <= response.status_code < 500 and response.status_code not in (408, 429):
+                # The backend will never accept this batch, retrying cannot help
+                logger.error(f"❌ Backend rejected batch of {len(payload)} events. "
+                             f"Status: {response.status_code}")
+                logger.error(f"Response: {response.text}")
+                return True
+            else:
+                logger.error(f"❌ Failed to send batch. Status: {response.status_code}")
+                return False
+                
+        except requests.exceptions.RequestException as e:
+            logger.error(f"❌ Network error sending batch: {e}")
+            return False
+        except Exception as e:
+            logger.error(f"❌ Error sending batch: {e}")
+            return False
+    
+    def send_occupancy(self, reports):
+        """Send per-camera occupancy reports (people-count series and heatmap)"""
+        try:
+            url = f"{self.base_url}/api/occupancy/from-python"
+            response = self.session.post(url, json={'reports': reports}, timeout=self.timeout)
+            
+            if response.status_code == 200:
+                logger.info(f"✅ Occupancy of {len(reports)} camera(s) sent successfully")
+                return True
+            else:
+                logger.error(f"❌ Failed to send occupancy. Status: {response.status_code}")
+                return False
+                
+        except requests.exceptions.RequestException as e:
+            logger.error(f"❌ Network error sending occupancy: {e}")
+            return False
+    
     def test_connection(self):
         """Test connection to Node.js backend"""
         try:
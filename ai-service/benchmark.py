@@ -0,0 +1,330 @@
+"""Offline replay and benchmark harness for the ai-service pipeline
+
+Examples:
+    python benchmark.py --source synthetic --frames 900 --stub-detector --stub-backend
+    python benchmark.py --source ./clips/lobby.mp4 --stub-backend
+    python benchmark.py --source ./frames/ --stub-detector --json results.json
+    python benchmark.py --source ./clips/lobby.mp4 --stub-backend --backend openvino --imgsz 416
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import tempfile
+import threading
+import logging
+from functools import partial
+import numpy as np
+from frame_source import FrameSource, ImageDirectorySource, open_source
+
+logger = logging.getLogger(__name__)
+
+COCO_SUBSET = {0: 'person', 24: 'backpack', 26: 'handbag', 28: 'suitcase', 39: 'bottle'}
+
+class SyntheticCapture(FrameSource):
+    def __init__(self, frames=600, width=640, height=480, objects=4, seed=0):
+        """Generate frames with moving rectangles; only retrieved frames are rendered"""
+        self.frames = frames
+        self.width = width
+        self.height = height
+        self.index = -1
+        rng = np.random.default_rng(seed)
+        self.positions = rng.uniform(0, 1, (objects, 2)) * [width - 80, height - 160]
+        self.velocities = rng.uniform(-4, 4, (objects, 2))
+        self.background = rng.integers(0, 40, (height, width, 3), dtype=np.uint8)
+
+    def grab(self):
+        if self.index + 1 >= self.frames:
+            return False
+        self.index += 1
+        self.timestamp = time.time()
+        return True
+
+    def retrieve(self):
+        frame = self.background.copy()
+        for x, y in self.positions_at(self.index).astype(int).tolist():
+            frame[y:y + 160, x:x + 80] = (200, 180, 160)
+        return True, frame
+
+    def positions_at(self, index):
+        """Object positions at a frame index, bouncing off the frame border"""
+        limits = np.array([self.width - 80, self.height - 160], dtype=np.float64)
+        raw = self.positions + self.velocities * index
+        return limits - np.abs(np.mod(raw, 2 * limits) - limits)
+
+class PacedCapture(FrameSource):
+    def __init__(self, capture, fps):
+        """Throttle another frame source to a real-time frame rate"""
+        self.capture = capture
+        self.interval = 1.0 / fps
+        self.next_time = None
+
+    def isOpened(self):
+        return self.capture.isOpened()
+
+    def grab(self):
+        now = time.perf_counter()
+        if self.next_time is not None and now < self.next_time:
+            time.sleep(self.next_time - now)
+        self.next_time = max(now, self.next_time or now) + self.interval
+        ok = self.capture.grab()
+        self.timestamp = self.capture.timestamp
+        return ok
+
+    def retrieve(self):
+        return self.capture.retrieve()
+
+    def release(self):
+        self.capture.release()
+
+class _StubBoxes:
+    def __init__(self, data):
+        self.data = data
+
+    def __len__(self):
+        return len(self.data)
+
+class _StubResult:
+    def __init__(self, data):
+        self.boxes = _StubBoxes(data)
+
+class StubDetector:
+    def __init__(self, objects=4, latency_ms=0.0, width=640, height=480, seed=0):
+        """Stand-in for the YOLO model: deterministic moving boxes and a fixed cost per frame"""
+        self.names = COCO_SUBSET
+        self.latency = latency_ms / 1000.0
+        self.motion = SyntheticCapture(frames=0, width=width, height=height, objects=objects, seed=seed)
+        # Mostly people, every fourth object is a backpack
+        self.class_ids = np.array([24 if i % 4 == 3 else 0 for i in range(objects)], dtype=np.float32)
+        self.calls = 0
+
+    def __call__(self, frames, conf=0.5, verbose=False):
+        if not isinstance(frames, list):
+            frames = [frames]
+        results = []
+        for _ in frames:
+            if self.latency:
+                time.sleep(self.latency)
+            xy = self.motion.positions_at(self.calls).astype(np.float32)
+            self.calls += 1
+            data = np.column_stack([
+                xy, xy + [80, 160],
+                np.full(len(xy), 0.9, dtype=np.float32),
+                self.class_ids
+            ])
+            results.append(_StubResult(data))
+        return results
+
+class StubAPIClient:
+    def __init__(self, latency_ms=0.0):
+        """Stand-in for the backend: accepts every batch after a fixed delay"""
+        self.timeout = 1
+        self.latency = latency_ms / 1000.0
+        self.events_received = 0
+        self.bytes_received = 0
+
+    def send_events(self, events):
+        if self.latency:
+            time.sleep(self.latency)
+        self.events_received += len(events)
+        self.bytes_received += sum(len(image or b'') for _, image in events)
+        return True
+
+    def send_occupancy(self, reports):
+        return True
+
+    def test_connection(self):
+        return True
+
+class _Timed:
+    def __init__(self, function, samples, lock):
+        """Callable wrapper that records its call durations and proxies other attributes"""
+        self.function = function
+        self.samples = samples
+        self.lock = lock
+
+    def __call__(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self.function(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self.lock:
+                self.samples.append(elapsed)
+
+    def __getattr__(self, name):
+        return getattr(self.function, name)
+
+class StageProfiler:
+    def __init__(self):
+        """Collect wall-clock latency samples per pipeline stage"""
+        self.samples = {}
+        self.lock = threading.Lock()
+
+    def wrap(self, obj, attribute, stage):
+        """Replace obj.attribute on this instance with a timed version"""
+        samples = self.samples.setdefault(stage, [])
+        setattr(obj, attribute, _Timed(getattr(obj, attribute), samples, self.lock))
+
+    def summary(self):
+        """Count and p50/p90/p99/max latency in milliseconds per stage"""
+        report = {}
+        with self.lock:
+            for stage, samples in self.samples.items():
+                if not samples:
+                    continue
+                values = np.array(samples) * 1000.0
+                p50, p90, p99 = np.percentile(values, [50, 90, 99])
+                report[stage] = {
+                    'count': len(values),
+                    'p50_ms': round(float(p50), 3),
+                    'p90_ms': round(float(p90), 3),
+                    'p99_ms': round(float(p99), 3),
+                    'max_ms': round(float(values.max()), 3),
+                }
+        return report
+
+def open_capture(args):
+    """Build the frame source for the requested source"""
+    if args.source == 'synthetic':
+        capture = SyntheticCapture(frames=args.frames, width=args.width, height=args.height,
+                                   objects=args.objects, seed=args.seed)
+    elif os.path.isdir(args.source):
+        capture = ImageDirectorySource(args.source, loop=args.loop)
+    else:
+        capture = open_source(args.source)
+    if args.fps:
+        capture = PacedCapture(capture, args.fps)
+    return capture
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def run(args):
+    """Drive the pipeline once and return the benchmark report"""
+    workdir = tempfile.mkdtemp(prefix='surveillance-bench-')
+    # Keep benchmark output away from the real image folder and spool
+    os.environ.setdefault('IMAGE_SAVE_PATH', os.path.join(workdir, 'events'))
+    os.environ.setdefault('EVENT_SPOOL_PATH', os.path.join(workdir, 'events.db'))
+    os.environ.setdefault('CLIP_SAVE_PATH', os.path.join(workdir, 'clips'))
+    os.environ.setdefault('SIMILARITY_INDEX_PATH', os.path.join(workdir, 'similarity'))
+    os.environ.setdefault('STATE_SNAPSHOT_PATH', os.path.join(workdir, 'state.json'))
+    os.environ.setdefault('OCCUPANCY_PATH', os.path.join(workdir, 'occupancy'))
+    os.environ.setdefault('LOCAL_SERVER_ENABLED', 'false')
+    if args.backend:
+        os.environ['INFERENCE_BACKEND'] = args.backend
+    if args.imgsz:
+        os.environ['INFERENCE_IMGSZ'] = str(args.imgsz)
+    if args.int8:
+        os.environ['INFERENCE_INT8'] = 'true'
+    if args.workers:
+        os.environ['INFERENCE_WORKERS'] = str(args.workers)
+
+    from camera import Camera
+    from main import SurveillanceSystem
+
+    model, model_factory = None, None
+    if args.stub_detector:
+        model_factory = partial(StubDetector, objects=args.objects, latency_ms=args.detector_latency_ms,
+                                width=args.width, height=args.height, seed=args.seed)
+        if not args.workers:
+            model = model_factory()
+    api_client = StubAPIClient(args.backend_latency_ms) if args.stub_backend else None
+
+    cameras = [Camera(args.source, number, capture=open_capture(args)) for number in range(args.cameras)]
+    system = SurveillanceSystem(model=model, api_client=api_client, cameras=cameras, display=False,
+                                model_factory=model_factory)
+
+    profiler = StageProfiler()
+    for camera in cameras:
+        profiler.wrap(camera, 'grab', 'frame_read')
+        profiler.wrap(camera, 'retrieve', 'frame_decode')
+        profiler.wrap(camera.motion_gate, 'should_process', 'motion_gate')
+        profiler.wrap(camera.event_detector, 'detect_events', 'detect_events')
+    if system.model is not None:
+        # With worker processes, inference is timed in the workers (surveillance_stage_seconds)
+        profiler.wrap(system, 'model', 'inference')
+        profiler.wrap(system, 'extract_detections', 'extract_detections')
+    if system.tiler is not None:
+        profiler.wrap(system.tiler, 'merge', 'merge_tiles')
+    profiler.wrap(system.image_processor, 'draw_detections', 'draw_detections')
+    profiler.wrap(system.image_processor, 'encode_jpeg', 'encode')
+    profiler.wrap(system.api_client, 'send_events', 'send_events')
+
+    start = time.perf_counter()
+    system.start_monitoring()
+    elapsed = time.perf_counter() - start
+
+    frames_read = sum(c.frame_count for c in cameras)
+    frames_decoded = profiler.summary().get('frame_decode', {}).get('count', 0)
+    frames_inferred = profiler.summary().get('detect_events', {}).get('count', 0)
+    return {
+        'source': args.source,
+        'cameras': args.cameras,
+        'elapsed_s': round(elapsed, 3),
+        'startup_s': {phase: round(seconds, 3) for phase, seconds in system.startup.breakdown().items()},
+        'frames_read': frames_read,
+        'frames_decoded': frames_decoded,
+        'frames_inferred': frames_inferred,
+        'read_fps': round(frames_read / elapsed, 2) if elapsed else 0.0,
+        'inference_fps': round(frames_inferred / elapsed, 2) if elapsed else 0.0,
+        'gate_skip_ratio': round(float(np.mean([c.motion_gate.skip_ratio for c in cameras])), 4),
+        'frames_dropped': sum(c.inference_slot.dropped for c in cameras),
+        'events_dropped': system.event_queue.dropped,
+        'events_delivered': system.event_delivery.delivered,
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'stages': profiler.summary(),
+    }
+
+def print_report(report):
+    """Print a human readable benchmark report"""
+    print(f"\n📈 Benchmark: {report['source']} ({report['cameras']} camera(s), {report['elapsed_s']}s)")
+    print(f"   frames read: {report['frames_read']} ({report['read_fps']} fps), "
+          f"decoded: {report['frames_decoded']}, "
+          f"inferred: {report['frames_inferred']} ({report['inference_fps']} fps), "
+          f"dropped: {report['frames_dropped']}, gate skip ratio: {report['gate_skip_ratio']:.1%}")
+    print(f"   events delivered: {report['events_delivered']}, dropped: {report['events_dropped']}, "
+          f"peak RSS: {report['peak_rss_mb']} MB")
+    print("   startup: " + ', '.join(f"{phase} {seconds}s" for phase, seconds in report['startup_s'].items()))
+    print(f"   {'stage':<20}{'count':>8}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for stage, stats in report['stages'].items():
+        print(f"   {stage:<20}{stats['count']:>8}{stats['p50_ms']:>10}{stats['p90_ms']:>10}"
+              f"{stats['p99_ms']:>10}{stats['max_ms']:>10}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the surveillance pipeline offline')
+    parser.add_argument('--source', default='synthetic',
+                        help="'synthetic', a video file or a directory of images")
+    parser.add_argument('--frames', type=int, default=600, help='synthetic frames per camera')
+    parser.add_argument('--width', type=int, default=640)
+    parser.add_argument('--height', type=int, default=480)
+    parser.add_argument('--objects', type=int, default=4, help='moving objects per synthetic frame')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--loop', type=int, default=1, help='times to replay an image directory')
+    parser.add_argument('--cameras', type=int, default=1, help='replay the source on N cameras')
+    parser.add_argument('--fps', type=float, default=0, help='pace the source in real time (0 = as fast as possible)')
+    parser.add_argument('--stub-detector', action='store_true', help='replace YOLO with a stub detector')
+    parser.add_argument('--detector-latency-ms', type=float, default=0.0)
+    parser.add_argument('--backend', choices=('pytorch', 'onnx', 'openvino'),
+                        help='inference backend of the real detector (default: INFERENCE_BACKEND)')
+    parser.add_argument('--imgsz', type=int, default=0, help='detector input size (default: INFERENCE_IMGSZ)')
+    parser.add_argument('--int8', action='store_true', help='use an int8-quantized export')
+    parser.add_argument('--workers', type=int, default=0, help='inference worker processes (default: in-process)')
+    parser.add_argument('--stub-backend', action='store_true', help='replace the Node.js backend with a stub')
+    parser.add_argument('--backend-latency-ms', type=float, default=0.0)
+    parser.add_argument('--json', help='also write the report to this file')
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    report = run(args)
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,122 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from event_detector import EventDetector
+from pipeline import LatestFrameSlot
+from motion_gate import MotionGate
+from clip_recorder import FrameRingBuffer
+from frame_source import open_source, as_frame_source
+from config import (PROCESS_EVERY_N_FRAMES, MOTION_GATE_ENABLED, MOTION_MIN_STRIDE,
+                    MOTION_HEARTBEAT_STRIDE, MOTION_AREA_THRESHOLD, MOTION_ANALYSIS_STRIDE, CLIP_ENABLED,
+                    CLIP_PRE_SECONDS, CLIP_POST_SECONDS, CLIP_FPS, CLIP_WIDTH,
+                    CLIP_QUALITY, CLIP_BUFFER_MAX_MB, CAMERA_WIDTH, CAMERA_HEIGHT, CAMERA_FPS,
+                    SOURCE_RECONNECT_MAX_SECONDS)
+
+logger = logging.getLogger(__name__)
+
+class Camera:
+    def __init__(self, source, number, location=None, capture=None):
+        """Open a camera source and set up its per-camera detection state
+
+        source is a device index, stream URL, video file or image directory.
+        An already opened capture object (a FrameSource, or anything with the
+        cv2.VideoCapture read/set/release interface) can be passed instead.
+        """
+        self.source = source
+        self.number = number
+        self.location = location or f"Camera-{number}"
+        self.camera_id = f'cam-{number:03d}'
+
+        # Each camera keeps its own event history and frame slots
+        self.event_detector = EventDetector()
+        self.display_slot = LatestFrameSlot()
+        self.inference_slot = LatestFrameSlot()
+        self.stream_slot = LatestFrameSlot()
+        self.last_detections = None  # drawn on the live stream
+        self.frame_count = 0
+        self.active = True
+        self.zones = None  # ZoneSet when ROI zones are configured
+
+        # Decides which frames are worth running the model on
+        self.motion_gate = MotionGate(
+            enabled=MOTION_GATE_ENABLED,
+            fixed_stride=PROCESS_EVERY_N_FRAMES,
+            min_stride=MOTION_MIN_STRIDE,
+            heartbeat_stride=MOTION_HEARTBEAT_STRIDE,
+            area_threshold=MOTION_AREA_THRESHOLD,
+            analysis_stride=MOTION_ANALYSIS_STRIDE
+        )
+
+        # Recent frames for pre/post-event clips (a little longer than a clip)
+        self.clip_buffer = None
+        if CLIP_ENABLED:
+            self.clip_buffer = FrameRingBuffer(
+                seconds=CLIP_PRE_SECONDS + CLIP_POST_SECONDS + 2,
+                fps=CLIP_FPS,
+                width=CLIP_WIDTH,
+                quality=CLIP_QUALITY,
+                max_bytes=int(CLIP_BUFFER_MAX_MB * 1024 * 1024)
+            )
+
+        if capture is not None:
+            self.cap = as_frame_source(capture)
+        else:
+            self.cap = open_source(source, CAMERA_WIDTH, CAMERA_HEIGHT, CAMERA_FPS,
+                                   reconnect_max_seconds=SOURCE_RECONNECT_MAX_SECONDS)
+        if not self.cap.isOpened():
+            logger.error(f"❌ Cannot open camera {source}")
+            raise Exception(f"Camera {source} not available")
+
+        logger.info(f"📷 Opened {self.location} ({self.camera_id}) from source {source}")
+
+    def read(self):
+        """Read the next frame from the camera"""
+        return self.cap.read()
+
+    def grab(self):
+        """Advance to the next frame without decoding it"""
+        return self.cap.grab()
+
+    def retrieve(self):
+        """Decode the grabbed frame"""
+        return self.cap.retrieve()
+
+    @property
+    def timestamp(self):
+        """Wall-clock time the last frame was grabbed"""
+        return self.cap.timestamp
+
+    def interrupt(self):
+        """Stop waiting for a dropped stream to come back"""
+        self.cap.interrupt()
+
+    def release(self):
+        """Release the underlying capture device"""
+        self.cap.release()
+
+def parse_camera_sources(sources):
+    """Parse a comma-separated source list into device indexes and URLs/paths"""
+    parsed = []
+    for source in sources.split(','):
+        source = source.strip()
+        if not source:
+            continue
+        parsed.append(int(source) if source.isdigit() else source)
+    return parsed
+
+def open_cameras(sources, locations=None):
+    """Open every camera source at once, numbering them by device index or position
+
+    Opening a network stream can take seconds, so sources are opened on
+    parallel threads; the cameras keep the order of the sources.
+    """
+    locations = locations or []
+    specs = []
+    for position, source in enumerate(sources):
+        number = source if isinstance(source, int) else position
+        location = locations[position] if position < len(locations) else None
+        specs.append((source, number, location))
+    if len(specs) <= 1:
+        return [Camera(*spec) for spec in specs]
+    with ThreadPoolExecutor(max_workers=len(specs), thread_name_prefix='open-camera') as executor:
+        futures = [executor.submit(Camera, *spec) for spec in specs]
+    return [future.result() for future in futures]
@@ -0,0 +1,125 @@
+import os
+import cv2
+import time
+import threading
+import logging
+import numpy as np
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+class FrameRingBuffer:
+    def __init__(self, seconds=15, fps=10, width=320, quality=60, max_bytes=32 * 1024 * 1024):
+        """Recent frames of one camera, downscaled and JPEG-encoded, under a hard memory cap"""
+        self.seconds = seconds
+        self.interval = 1.0 / fps
+        self.width = width
+        self.quality = quality
+        self.max_bytes = max_bytes
+        self.frames = deque()
+        self.bytes = 0
+        self.last_added = 0
+        self.lock = threading.Lock()
+
+    def due(self, timestamp):
+        """True if a frame captured at timestamp would be stored"""
+        return timestamp - self.last_added >= self.interval
+
+    def add(self, frame, timestamp):
+        """Store a frame if the buffer is due for one (rate-limited to fps)"""
+        if timestamp - self.last_added < self.interval:
+            return
+        self.last_added = timestamp
+
+        height = max(1, frame.shape[0] * self.width // frame.shape[1])
+        small = cv2.resize(frame, (self.width, height), interpolation=cv2.INTER_AREA)
+        ok, encoded = cv2.imencode('.jpg', small, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if not ok:
+            return
+        data = encoded.tobytes()
+
+        with self.lock:
+            self.frames.append((timestamp, data))
+            self.bytes += len(data)
+            # Evict by age first, then by size so the cap always holds
+            while self.frames and (self.frames[0][0] < timestamp - self.seconds or self.bytes > self.max_bytes):
+                _, old = self.frames.popleft()
+                self.bytes -= len(old)
+
+    def window(self, start, end):
+        """Encoded frames captured between start and end"""
+        with self.lock:
+            return [(ts, data) for ts, data in self.frames if start <= ts <= end]
+
+class ClipWriter:
+    def __init__(self, save_path, pre_seconds=5, post_seconds=5, fps=10, codec='mp4v'):
+        """Write pre/post-event clips from frame ring buffers in a background thread"""
+        self.save_path = save_path
+        self.pre_seconds = pre_seconds
+        self.post_seconds = post_seconds
+        self.fps = fps
+        self.codec = codec
+        self.pending = []
+        self.condition = threading.Condition()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.clips_written = 0
+        os.makedirs(save_path, exist_ok=True)
+
+    def start(self):
+        """Start the background writer thread"""
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, name='clip-writer', daemon=True)
+        self.thread.start()
+
+    def request(self, buffer, event_time, camera_id, event_type):
+        """Schedule a clip around event_time and return the path it will be written to"""
+        timestamp = time.strftime("%Y%m%d_%H%M%S", time.localtime(event_time))
+        filename = f"clip_{camera_id}_{timestamp}_{int(event_time * 1000) % 1000:03d}_{event_type}.mp4"
+        path = os.path.join(self.save_path, filename)
+        with self.condition:
+            self.pending.append((event_time + self.post_seconds, buffer, event_time - self.pre_seconds, path))
+            self.condition.notify()
+        return path
+
+    def close(self):
+        """Write the clips still pending (with the frames available) and stop"""
+        self.stop_event.set()
+        with self.condition:
+            self.condition.notify()
+        if self.thread:
+            self.thread.join(timeout=self.post_seconds + 5)
+
+    def _run(self):
+        """Writer loop: wait until each clip's post-event window has been captured"""
+        while True:
+            with self.condition:
+                now = time.time()
+                stopping = self.stop_event.is_set()
+                ready = [p for p in self.pending if p[0] <= now or stopping]
+                self.pending = [p for p in self.pending if p not in ready]
+                if not ready:
+                    if stopping:
+                        return
+                    wait = min((p[0] for p in self.pending), default=now + 1) - now
+                    self.condition.wait(timeout=max(0.05, min(wait, 1)))
+                    continue
+            for end, buffer, start, path in ready:
+                self._write(buffer.window(start, end), path)
+
+    def _write(self, frames, path):
+        """Decode buffered JPEGs and write them as a video file"""
+        if not frames:
+            logger.warning(f"⚠️ No buffered frames for clip {os.path.basename(path)}")
+            return
+        try:
+            first = cv2.imdecode(np.frombuffer(frames[0][1], np.uint8), cv2.IMREAD_COLOR)
+            height, width = first.shape[:2]
+            writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*self.codec), self.fps, (width, height))
+            for _, data in frames:
+                writer.write(cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR))
+            writer.release()
+            self.clips_written += 1
+            logger.info(f"🎞️ Saved event clip: {os.path.basename(path)} ({len(frames)} frames)")
+        except Exception as e:
+            logger.error(f"❌ Error writing clip {path}: {e}")
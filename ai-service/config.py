@@ -8,22 +8,121 @@ CAMERA_INDEX = int(os.getenv('CAMERA_INDEX', 0))
 CAMERA_WIDTH = int(os.getenv('CAMERA_WIDTH', 640))
 CAMERA_HEIGHT = int(os.getenv('CAMERA_HEIGHT', 480))
 CAMERA_FPS = int(os.getenv('CAMERA_FPS', 30))
+# Comma-separated device indexes, stream URLs or video files (multi-camera mode)
+CAMERA_SOURCES = os.getenv('CAMERA_SOURCES', '')
+CAMERA_LOCATIONS = os.getenv('CAMERA_LOCATIONS', '')
+SOURCE_RECONNECT_MAX_SECONDS = float(os.getenv('SOURCE_RECONNECT_MAX_SECONDS', 30))  # live streams only
 
 # AI Model settings
 CONFIDENCE_THRESHOLD = float(os.getenv('CONFIDENCE_THRESHOLD', 0.5))
 MODEL_PATH = os.getenv('MODEL_PATH', './saved_models/')
+INFERENCE_BATCH_SIZE = int(os.getenv('INFERENCE_BATCH_SIZE', 8))
+MODEL_NAME = os.getenv('MODEL_NAME', 'yolov8n')
+INFERENCE_BACKEND = os.getenv('INFERENCE_BACKEND', 'pytorch')  # pytorch, onnx or openvino
+INFERENCE_IMGSZ = int(os.getenv('INFERENCE_IMGSZ', 640))
+INFERENCE_INT8 = os.getenv('INFERENCE_INT8', 'false').lower() == 'true'
+INT8_CALIBRATION_DATA = os.getenv('INT8_CALIBRATION_DATA', 'coco8.yaml')  # dataset YAML or image directory
+MODEL_WARMUP = os.getenv('MODEL_WARMUP', 'true').lower() == 'true'
+INFERENCE_WORKERS = int(os.getenv('INFERENCE_WORKERS', 0))  # 0 runs the model in this process
+INFERENCE_SLOTS = int(os.getenv('INFERENCE_SLOTS', 0))  # shared-memory frame slots, 0 = 2 per worker
+INFERENCE_SLOT_MB = float(os.getenv('INFERENCE_SLOT_MB', 8))  # must hold one full frame
+# Tiled inference: slice large frames into overlapping tiles so small, distant objects are kept
+TILED_INFERENCE = os.getenv('TILED_INFERENCE', 'false').lower() == 'true'
+TILE_SIZE = int(os.getenv('TILE_SIZE', 640))
+TILE_OVERLAP = float(os.getenv('TILE_OVERLAP', 0.2))  # fraction of a tile shared with its neighbour
+TILE_MIN_FRAME_SIZE = int(os.getenv('TILE_MIN_FRAME_SIZE', 1280))  # frames up to this size are not tiled
+TILE_FULL_FRAME = os.getenv('TILE_FULL_FRAME', 'true').lower() == 'true'  # also run the whole frame
+TILE_MATCH_THRESHOLD = float(os.getenv('TILE_MATCH_THRESHOLD', 0.5))  # cut box inside another, over smaller box
+TILE_NMS_IOU = float(os.getenv('TILE_NMS_IOU', 0.5))  # same object detected by two tiles
+# JSON file (or inline JSON) of polygon zones: {"cam-000": {"door": [[x, y], ...]}}
+ROI_ZONES = os.getenv('ROI_ZONES', '')
 
 # API settings
 NODEJS_API_URL = os.getenv('NODEJS_API_URL', 'http://localhost:5000')
+DELIVERY_QUEUE_SIZE = int(os.getenv('DELIVERY_QUEUE_SIZE', 256))
+DELIVERY_BATCH_SIZE = int(os.getenv('DELIVERY_BATCH_SIZE', 20))
+DELIVERY_RETRY_BASE_SECONDS = float(os.getenv('DELIVERY_RETRY_BASE_SECONDS', 1))
+DELIVERY_RETRY_MAX_SECONDS = float(os.getenv('DELIVERY_RETRY_MAX_SECONDS', 60))
+EVENT_SPOOL_PATH = os.getenv('EVENT_SPOOL_PATH', './spool/events.db')
 
 # Image settings
 IMAGE_SAVE_PATH = os.getenv('IMAGE_SAVE_PATH', '../uploads/events/')
 IMAGE_QUALITY = int(os.getenv('IMAGE_QUALITY', 85))
 MAX_IMAGE_SIZE_KB = int(os.getenv('MAX_IMAGE_SIZE_KB', 200))
+JPEG_MIN_QUALITY = int(os.getenv('JPEG_MIN_QUALITY', 30))
+IMAGE_QUOTA_MB = float(os.getenv('IMAGE_QUOTA_MB', 1024))  # oldest images are evicted beyond this
+IMAGE_DEDUP_DISTANCE = int(os.getenv('IMAGE_DEDUP_DISTANCE', 12))  # max differing bits of 256, -1 disables
+IMAGE_DEDUP_WINDOW_SECONDS = float(os.getenv('IMAGE_DEDUP_WINDOW_SECONDS', 300))
+IMAGE_DEDUP_CACHE_MB = float(os.getenv('IMAGE_DEDUP_CACHE_MB', 16))
+
+# Event clip settings (pre/post-event video from an in-memory ring buffer)
+CLIP_ENABLED = os.getenv('CLIP_ENABLED', 'true').lower() == 'true'
+CLIP_SAVE_PATH = os.getenv('CLIP_SAVE_PATH', '../uploads/clips/')
+CLIP_PRE_SECONDS = float(os.getenv('CLIP_PRE_SECONDS', 5))
+CLIP_POST_SECONDS = float(os.getenv('CLIP_POST_SECONDS', 5))
+CLIP_FPS = float(os.getenv('CLIP_FPS', 10))
+CLIP_WIDTH = int(os.getenv('CLIP_WIDTH', 320))
+CLIP_QUALITY = int(os.getenv('CLIP_QUALITY', 60))
+CLIP_BUFFER_MAX_MB = float(os.getenv('CLIP_BUFFER_MAX_MB', 32))  # per camera
+CLIP_CODEC = os.getenv('CLIP_CODEC', 'mp4v')
 
 # Event detection settings
-EVENT_COOLDOWN_SECONDS = int(os.getenv('EVENT_COOLDOWN_SECONDS', 5))
-PROCESS_EVERY_N_FRAMES = int(os.getenv('PROCESS_EVERY_N_FRAMES', 5))
+EVENT_COOLDOWN_SECONDS = float(os.getenv('EVENT_COOLDOWN_SECONDS', 5))
+EVENT_COALESCE_WINDOW_SECONDS = float(os.getenv('EVENT_COALESCE_WINDOW_SECONDS', 10))  # 0 sends every event
+EVENT_COALESCE_MAX_SECONDS = float(os.getenv('EVENT_COALESCE_MAX_SECONDS', 60))
+PROCESS_EVERY_N_FRAMES = int(os.getenv('PROCESS_EVERY_N_FRAMES', 5))  # used when the motion gate is off
+MOTION_GATE_ENABLED = os.getenv('MOTION_GATE_ENABLED', 'true').lower() == 'true'
+MOTION_MIN_STRIDE = int(os.getenv('MOTION_MIN_STRIDE', 1))
+MOTION_HEARTBEAT_STRIDE = int(os.getenv('MOTION_HEARTBEAT_STRIDE', 60))
+MOTION_AREA_THRESHOLD = float(os.getenv('MOTION_AREA_THRESHOLD', 0.005))
+MOTION_ANALYSIS_STRIDE = int(os.getenv('MOTION_ANALYSIS_STRIDE', 3))  # idle frames between motion checks
+TRACKER_IOU_THRESHOLD = float(os.getenv('TRACKER_IOU_THRESHOLD', 0.3))
+TRACK_MIN_HITS = int(os.getenv('TRACK_MIN_HITS', 3))
+TRACK_MAX_MISSES = int(os.getenv('TRACK_MAX_MISSES', 5))
+LOITERING_SECONDS = float(os.getenv('LOITERING_SECONDS', 30))
+UNATTENDED_OBJECT_SECONDS = float(os.getenv('UNATTENDED_OBJECT_SECONDS', 20))
+
+# Adaptive quality (keeps capture-to-events latency near the target)
+QUALITY_CONTROL_ENABLED = os.getenv('QUALITY_CONTROL_ENABLED', 'true').lower() == 'true'
+LATENCY_TARGET_MS = float(os.getenv('LATENCY_TARGET_MS', 300))
+QUALITY_INTERVAL_SECONDS = float(os.getenv('QUALITY_INTERVAL_SECONDS', 5))
+QUALITY_MAX_IMGSZ = int(os.getenv('QUALITY_MAX_IMGSZ', os.getenv('INFERENCE_IMGSZ', 640)))
+QUALITY_MIN_IMGSZ = int(os.getenv('QUALITY_MIN_IMGSZ', 320))
+QUALITY_MAX_STRIDE = int(os.getenv('QUALITY_MAX_STRIDE', 4))
+QUALITY_MIN_JPEG = int(os.getenv('QUALITY_MIN_JPEG', 50))
+
+# Warm restart: tracker and cooldown state are snapshotted and restored on startup
+STATE_SNAPSHOT_PATH = os.getenv('STATE_SNAPSHOT_PATH', './state/event_state.json')
+STATE_SNAPSHOT_SECONDS = float(os.getenv('STATE_SNAPSHOT_SECONDS', 5))  # 0 disables snapshots
+STATE_MAX_AGE_SECONDS = float(os.getenv('STATE_MAX_AGE_SECONDS', 120))  # older snapshots are ignored
+
+# Pipeline settings
+EVENT_QUEUE_SIZE = int(os.getenv('EVENT_QUEUE_SIZE', 32))
+STAGE_JOIN_TIMEOUT_SECONDS = float(os.getenv('STAGE_JOIN_TIMEOUT_SECONDS', 5))
+
+# Similar-event search (descriptor index served at /similar on the local server)
+SIMILARITY_ENABLED = os.getenv('SIMILARITY_ENABLED', 'true').lower() == 'true'
+SIMILARITY_INDEX_PATH = os.getenv('SIMILARITY_INDEX_PATH', './similarity_index/')
+
+# Occupancy analytics: per-camera heatmap and people-count series, flushed to compact files
+OCCUPANCY_ENABLED = os.getenv('OCCUPANCY_ENABLED', 'true').lower() == 'true'
+OCCUPANCY_PATH = os.getenv('OCCUPANCY_PATH', './occupancy/')
+OCCUPANCY_GRID_WIDTH = int(os.getenv('OCCUPANCY_GRID_WIDTH', 64))  # heatmap cells across the frame
+OCCUPANCY_BUCKET_SECONDS = int(os.getenv('OCCUPANCY_BUCKET_SECONDS', 60))  # people-count series interval
+OCCUPANCY_FLUSH_SECONDS = float(os.getenv('OCCUPANCY_FLUSH_SECONDS', 300))
+OCCUPANCY_SEND_TO_BACKEND = os.getenv('OCCUPANCY_SEND_TO_BACKEND', 'false').lower() == 'true'
+
+# Local HTTP server (/metrics and other local endpoints)
+LOCAL_SERVER_ENABLED = os.getenv('LOCAL_SERVER_ENABLED', 'true').lower() == 'true'
+LOCAL_SERVER_HOST = os.getenv('LOCAL_SERVER_HOST', '127.0.0.1')
+LOCAL_SERVER_PORT = int(os.getenv('LOCAL_SERVER_PORT', 9100))
+
+# Display and live view
+HEADLESS = os.getenv('HEADLESS', 'false').lower() == 'true'  # no cv2.imshow window
+LIVE_STREAM_ENABLED = os.getenv('LIVE_STREAM_ENABLED', 'false').lower() == 'true'  # MJPEG on the local server
+LIVE_STREAM_FPS = float(os.getenv('LIVE_STREAM_FPS', 10))
+LIVE_STREAM_QUALITY = int(os.getenv('LIVE_STREAM_QUALITY', 70))
+LIVE_STREAM_WIDTH = int(os.getenv('LIVE_STREAM_WIDTH', 0))  # 0 keeps the capture size
 
 # Logging
 LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
@@ -0,0 +1,193 @@
+import os
+import glob
+import time
+import shutil
+import logging
+import importlib.util
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Backend name -> (ultralytics export format, runtime module it needs)
+BACKENDS = {
+    'pytorch': (None, 'torch'),
+    'onnx': ('onnx', 'onnxruntime'),
+    'openvino': ('openvino', 'openvino'),
+}
+
+def calibration_images(data, limit=64):
+    """Image paths for int8 calibration: a directory of images or an ultralytics dataset YAML"""
+    if os.path.isdir(data):
+        directories = [data]
+    else:
+        from ultralytics.data.utils import check_det_dataset
+        dataset = check_det_dataset(data)  # downloads small datasets such as coco8 on first use
+        directories = [dataset[split] for split in ('train', 'val') if dataset.get(split)]
+        directories = [d for entry in directories for d in (entry if isinstance(entry, list) else [entry])]
+    paths = []
+    for directory in directories:
+        for pattern in ('*.jpg', '*.jpeg', '*.png', '*.bmp'):
+            paths.extend(glob.glob(os.path.join(directory, '**', pattern), recursive=True))
+    return sorted(paths)[:limit]
+
+def letterbox(image, size):
+    """Model input like ultralytics builds it: resized to fit, padded grey, RGB, CHW, 0..1"""
+    import cv2
+    height, width = image.shape[:2]
+    scale = min(size / height, size / width)
+    resized = cv2.resize(image, (round(width * scale), round(height * scale)), interpolation=cv2.INTER_LINEAR)
+    canvas = np.full((size, size, 3), 114, dtype=np.uint8)
+    top = (size - resized.shape[0]) // 2
+    left = (size - resized.shape[1]) // 2
+    canvas[top:top + resized.shape[0], left:left + resized.shape[1]] = resized
+    return (canvas[:, :, ::-1].transpose(2, 0, 1)[None] / 255.0).astype(np.float32)
+
+class Detector:
+    def __init__(self, model_name='yolov8n', backend='pytorch', imgsz=640, int8=False,
+                 model_path='./saved_models/', calibration_data='coco8.yaml'):
+        """YOLO detector on a selectable backend, called like an ultralytics model
+
+        Exported models are cached under model_path, keyed by model, input
+        size, backend and precision, so the export only runs once. Every
+        backend is loaded through ultralytics, so results (and therefore
+        DetectionBatch.from_result) look the same whichever one runs.
+        """
+        from ultralytics import YOLO
+
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown inference backend '{backend}' (choose from {', '.join(BACKENDS)})")
+        runtime = BACKENDS[backend][1]
+        if backend != 'pytorch' and importlib.util.find_spec(runtime) is None:
+            logger.warning(f"⚠️ {runtime} is not installed, falling back to the PyTorch backend")
+            backend = 'pytorch'
+        if int8 and backend == 'pytorch':
+            logger.warning("⚠️ int8 quantization needs the onnx or openvino backend, running fp32")
+            int8 = False
+
+        self.model_name = model_name
+        self.backend = backend
+        self.imgsz = imgsz
+        self.int8 = int8
+        self.model_path = model_path
+        self.calibration_data = calibration_data
+
+        weights = self._prepare_weights(YOLO)
+        self.model = self._load(YOLO, weights)
+        self.names = self.model.names
+        logger.info(f"🧠 Detector: {model_name} on {backend} at {imgsz}px{' int8' if int8 else ''} ({weights})")
+
+    @property
+    def cache_name(self):
+        """Cache key of the exported model: model, input size, backend and precision"""
+        precision = 'int8' if self.int8 else 'fp32'
+        if self.backend == 'openvino':
+            # ultralytics only recognizes an OpenVINO model directory by this suffix
+            return f"{self.model_name}_{self.imgsz}_{precision}_openvino_model"
+        return f"{self.model_name}_{self.imgsz}_{self.backend}_{precision}.onnx"
+
+    def _prepare_weights(self, YOLO):
+        """Path of the weights to load, exporting them on first use"""
+        if self.backend == 'pytorch':
+            local = os.path.join(self.model_path, f"{self.model_name}.pt")
+            return local if os.path.exists(local) else f"{self.model_name}.pt"
+
+        cached = os.path.join(self.model_path, self.cache_name)
+        if os.path.exists(cached):
+            return cached
+
+        os.makedirs(self.model_path, exist_ok=True)
+        logger.info(f"📦 Exporting {self.model_name} for {self.backend} (cached as {cached})...")
+        start = time.perf_counter()
+        source = self._prepare_source(YOLO)
+
+        export_format = BACKENDS[self.backend][0]
+        options = {'format': export_format, 'imgsz': self.imgsz, 'dynamic': True}
+        if self.int8 and self.backend == 'openvino':
+            # OpenVINO quantizes statically, calibrated on a small dataset
+            options.update(int8=True, data=self.calibration_data)
+        exported = YOLO(source).export(**options)
+
+        if self.int8 and self.backend == 'onnx':
+            self._quantize_onnx(exported, cached)
+            os.remove(exported)
+        else:
+            shutil.move(exported, cached)
+
+        logger.info(f"✅ Exported {cached} in {time.perf_counter() - start:.1f}s")
+        return cached
+
+    def _load(self, YOLO, weights):
+        """Load the weights, discarding an exported model that ultralytics cannot load"""
+        try:
+            return YOLO(weights, task='detect')
+        except Exception as e:
+            if self.backend == 'pytorch':
+                raise
+            # Remove the broken export so the next start exports it again
+            if os.path.isdir(weights):
+                shutil.rmtree(weights, ignore_errors=True)
+            elif os.path.exists(weights):
+                os.remove(weights)
+            raise RuntimeError(f"Exported {self.backend} model {weights} failed to load: {e}") from e
+
+    def _quantize_onnx(self, source, target):
+        """Static QDQ int8 quantization, calibrated on the same data as the OpenVINO export
+
+        Dynamic quantization turns convolutions into ConvInteger ops, which
+        are usually slower than fp32 on CPU; static QDQ keeps them fast.
+        """
+        import cv2
+        import onnxruntime
+        from onnxruntime.quantization import (quantize_static, CalibrationDataReader, QuantFormat,
+                                              QuantType, CalibrationMethod)
+
+        paths = calibration_images(self.calibration_data)
+        if not paths:
+            raise RuntimeError(f"No calibration images found in {self.calibration_data}")
+        input_name = onnxruntime.InferenceSession(source, providers=['CPUExecutionProvider']).get_inputs()[0].name
+        imgsz = self.imgsz
+
+        class Reader(CalibrationDataReader):
+            def __init__(self):
+                self.paths = iter(paths)
+
+            def get_next(self):
+                for path in self.paths:
+                    image = cv2.imread(path)
+                    if image is not None:
+                        return {input_name: letterbox(image, imgsz)}
+                return None
+
+        logger.info(f"📏 Calibrating int8 ONNX model on {len(paths)} image(s) from {self.calibration_data}")
+        quantize_static(source, target, Reader(),
+                        quant_format=QuantFormat.QDQ,
+                        activation_type=QuantType.QUInt8,
+                        weight_type=QuantType.QInt8,
+                        per_channel=True,
+                        calibrate_method=CalibrationMethod.MinMax)
+
+    def _prepare_source(self, YOLO):
+        """PyTorch weights to export from, kept under model_path"""
+        local = os.path.join(self.model_path, f"{self.model_name}.pt")
+        if not os.path.exists(local):
+            YOLO(f"{self.model_name}.pt")  # downloads into the working directory
+            if os.path.exists(f"{self.model_name}.pt"):
+                shutil.move(f"{self.model_name}.pt", local)
+            else:
+                return f"{self.model_name}.pt"
+        return local
+
+    def set_imgsz(self, imgsz):
+        """Change the input size at runtime (rounded to the model stride of 32)"""
+        self.imgsz = max(32, int(round(imgsz / 32)) * 32)
+
+    def __call__(self, frames, conf=0.5, verbose=False):
+        return self.model(frames, conf=conf, imgsz=self.imgsz, verbose=verbose)
+
+    def warmup(self, batch_size=1, runs=2):
+        """Run dummy batches so the first real frame does not pay for lazy initialization"""
+        start = time.perf_counter()
+        frame = np.zeros((self.imgsz, self.imgsz, 3), dtype=np.uint8)
+        for _ in range(runs):
+            self([frame] * batch_size, conf=0.99)
+        logger.info(f"🔥 Detector warm-up took {(time.perf_counter() - start) * 1000:.0f} ms")
@@ -0,0 +1,103 @@
+import logging
+from collections import Counter
+from datetime import datetime
+from metrics import REGISTRY
+
+EVENTS_COALESCED = REGISTRY.counter(
+    'surveillance_events_coalesced_total', 'Events merged into a summary event instead of being sent alone',
+    ('camera',))
+
+logger = logging.getLogger(__name__)
+
+class _Burst:
+    __slots__ = ('opening', 'events', 'first_seen', 'last_seen', 'peak_people', 'representative')
+
+    def __init__(self, opening, timestamp):
+        self.opening = opening
+        self.events = []
+        self.first_seen = timestamp
+        self.last_seen = timestamp
+        self.peak_people = -1
+        self.representative = None
+
+    def add(self, item, timestamp, people):
+        self.events.append(item[1])
+        self.last_seen = timestamp
+        # Keep one frame only: the busiest one (latest on ties)
+        if people >= self.peak_people:
+            self.peak_people = people
+            self.representative = item
+
+class EventCoalescer:
+    def __init__(self, window_seconds=10, max_window_seconds=60):
+        """Merge the follow-ups of a burst per camera, zone and event type into one summary event
+
+        The event that opens a burst is sent at once; the burst then stays
+        open while events keep arriving within window_seconds of each other,
+        for at most max_window_seconds, and its follow-ups are sent as one
+        summary when it closes (a single follow-up unchanged).
+        window_seconds=0 disables coalescing.
+        Types are never folded together, so a rare alert (unattended object,
+        loitering) keeps its own eventType next to a burst of entries.
+        """
+        self.window = window_seconds
+        self.max_window = max_window_seconds
+        self.bursts = {}
+
+    def add(self, camera, event, frame, detections):
+        """Add an event; True when it opened a new burst and should be sent now"""
+        key = (camera.camera_id, event.get('zone'), event['type'])
+        timestamp = event['timestamp']
+        burst = self.bursts.get(key)
+        if burst is None:
+            self.bursts[key] = _Burst(event, timestamp)
+            return True
+        burst.add((camera, event, frame, detections), timestamp, detections.count('person'))
+        return False
+
+    def due(self, now, flush=False):
+        """(camera, event, frame, detections) items for the follow-ups of bursts that have closed"""
+        ready = []
+        for key, burst in list(self.bursts.items()):
+            quiet = now - burst.last_seen >= self.window
+            too_long = now - burst.first_seen >= self.max_window
+            if flush or quiet or too_long:
+                del self.bursts[key]
+                if burst.events:
+                    ready.append(self._emit(burst))
+        return ready
+
+    def _emit(self, burst):
+        camera, event, frame, detections = burst.representative
+        if len(burst.events) == 1:
+            return burst.representative
+
+        EVENTS_COALESCED.labels(camera.camera_id).inc(len(burst.events))
+        counts = Counter(e['type'] for e in burst.events)
+        first_seen = burst.events[0]['timestamp']
+        duration = burst.last_seen - first_seen
+        breakdown = ', '.join(f"{count} {event_type.replace('_', ' ')}" for event_type, count in counts.most_common())
+        track_ids = sorted(set(t for e in burst.events for t in e.get('trackIds', [])))
+
+        summary = {
+            'type': event['type'],
+            'description': f"{len(burst.events)} more events in {duration:.0f}s: {breakdown}. "
+                           f"Peak people: {burst.peak_people}",
+            'confidence': max(e['confidence'] for e in burst.events),
+            'timestamp': first_seen,
+            'duration': duration,
+            'trackIds': track_ids,
+            'zone': event.get('zone'),
+            'summary': {
+                'eventCount': len(burst.events),
+                'eventCounts': dict(counts),
+                'firstSeen': datetime.fromtimestamp(first_seen).isoformat(),
+                'lastSeen': datetime.fromtimestamp(burst.last_seen).isoformat(),
+                'peakPeople': burst.peak_people
+            }
+        }
+        # The clip of the opening event shows what led up to the burst
+        if burst.opening.get('clipPath'):
+            summary['clipPath'] = burst.opening['clipPath']
+        logger.info(f"🧺 Coalesced {len(burst.events)} follow-up events on {camera.location} ({breakdown})")
+        return camera, summary, frame, detections
@@ -0,0 +1,246 @@
+import os
+import json
+import time
+import uuid
+import itertools
+import queue
+import sqlite3
+import threading
+import logging
+from metrics import REGISTRY, STAGE_SECONDS
+
+DELIVERY_LATENCY = REGISTRY.histogram(
+    'surveillance_delivery_latency_seconds', 'Time from submission to backend acknowledgement')
+EVENTS_DELIVERED = REGISTRY.counter(
+    'surveillance_events_delivered_total', 'Events acknowledged by the backend')
+EVENTS_FAILED = REGISTRY.counter(
+    'surveillance_events_failed_total', 'Event delivery attempts that failed and were spooled for retry')
+
+logger = logging.getLogger(__name__)
+
+class EventSpool:
+    def __init__(self, path):
+        """Open (or create) the on-disk store-and-forward spool"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS events ('
+            ' seq INTEGER PRIMARY KEY,'
+            ' queued_at REAL NOT NULL,'
+            ' payload TEXT NOT NULL,'
+            ' image BLOB)'
+        )
+        # Spools written before images were stored inline lack the column
+        columns = [row[1] for row in self._conn.execute('PRAGMA table_info(events)')]
+        if 'image' not in columns:
+            self._conn.execute('ALTER TABLE events ADD COLUMN image BLOB')
+        self._conn.commit()
+
+    def append(self, items):
+        """Store (seq, queued_at, event_data, image_bytes) items"""
+        if not items:
+            return
+        with self._lock:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO events (seq, queued_at, payload, image) VALUES (?, ?, ?, ?)',
+                [(seq, queued_at, json.dumps(event_data), image)
+                 for seq, queued_at, event_data, image in items]
+            )
+            self._conn.commit()
+
+    def peek(self, limit):
+        """Return the oldest spooled items in submission order"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT seq, queued_at, payload, image FROM events ORDER BY seq LIMIT ?',
+                (limit,)
+            ).fetchall()
+        return [(seq, queued_at, json.loads(payload), image)
+                for seq, queued_at, payload, image in rows]
+
+    def remove(self, items):
+        """Delete delivered items from the spool"""
+        with self._lock:
+            self._conn.executemany('DELETE FROM events WHERE seq = ?', [(item[0],) for item in items])
+            self._conn.commit()
+
+    def last_seq(self):
+        """Return the highest sequence number stored in the spool"""
+        with self._lock:
+            return self._conn.execute('SELECT MAX(seq) FROM events').fetchone()[0] or 0
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM events').fetchone()[0]
+
+    def close(self):
+        """Close the spool database"""
+        with self._lock:
+            self._conn.close()
+
+class EventDelivery:
+    def __init__(self, api_client, spool_path, queue_size=256, batch_size=20,
+                 retry_base_seconds=1.0, retry_max_seconds=60.0):
+        """Deliver events in the background with batching, retries and a disk spool"""
+        self.api_client = api_client
+        self.spool = EventSpool(spool_path)
+        # Sequence numbers fix delivery order no matter which path an event takes
+        self.sequence = itertools.count(self.spool.last_seq() + 1)
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.batch_size = batch_size
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.retry_delay = 0
+        self.next_attempt = 0
+
+        self.stop_event = threading.Event()
+        self.thread = None
+        # Guards the hand-over of the final spooling when close() times out
+        self.close_lock = threading.Lock()
+        self.finished = True
+        self.close_pending = False
+
+        # Counters
+        self.delivered = 0
+        self.failed_attempts = 0
+        self.spooled = 0
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+        self.total_latency = 0.0
+
+        pending = len(self.spool)
+        if pending:
+            logger.info(f"📦 {pending} spooled events waiting to be replayed")
+
+    def start(self):
+        """Start the background delivery thread"""
+        self.stop_event.clear()
+        self.finished = False
+        self.thread = threading.Thread(target=self._run, name='event-delivery', daemon=True)
+        self.thread.start()
+
+    def submit(self, event_data, image_bytes=None):
+        """Queue an event (and its encoded JPEG) for delivery without blocking the caller"""
+        # The delivery id travels with the event through the spool, so the
+        # backend can skip events it already saved when a batch is retried
+        event_data = dict(event_data, deliveryId=uuid.uuid4().hex)
+        item = (next(self.sequence), time.time(), event_data, image_bytes)
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            # Never drop: overflow goes straight to disk, the delivery loop
+            # spools the older in-memory events behind it in sequence order
+            self.spool.append([item])
+            self.spooled += 1
+
+    def stats(self):
+        """Return queue depth and delivery latency counters"""
+        return {
+            'queued': self.queue.qsize(),
+            'spooled': len(self.spool),
+            'delivered': self.delivered,
+            'failedAttempts': self.failed_attempts,
+            'lastLatency': self.last_latency,
+            'maxLatency': self.max_latency,
+            'avgLatency': self.total_latency / self.delivered if self.delivered else 0.0,
+        }
+
+    def close(self):
+        """Stop delivering and persist anything still in memory to the spool"""
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=self.api_client.timeout + 1)
+        with self.close_lock:
+            if not self.finished:
+                # Still inside a delivery: the thread spools and closes when it is done
+                self.close_pending = True
+                logger.warning("⏳ Event delivery still in progress, spooling when it finishes")
+                return
+        self._shutdown()
+
+    def _shutdown(self):
+        """Spool what is left in memory and close the spool"""
+        self.spool.append(self._drain(self.queue.qsize()))
+        remaining = len(self.spool)
+        if remaining:
+            logger.info(f"📦 {remaining} events left in spool for the next run")
+        self.spool.close()
+
+    def _drain(self, limit, timeout=None):
+        """Take up to limit items from the in-memory queue"""
+        items = []
+        try:
+            items.append(self.queue.get(timeout=timeout) if timeout else self.queue.get_nowait())
+            while len(items) < limit:
+                items.append(self.queue.get_nowait())
+        except queue.Empty:
+            pass
+        return items
+
+    def _run(self):
+        """Delivery loop: replay the spool in order, then send fresh batches"""
+        while not self.stop_event.is_set():
+            backing_off = time.time() < self.next_attempt
+            replaying = len(self.spool) > 0
+
+            # Don't idle on the queue while a backlog is waiting to be replayed
+            timeout = 0.5 if backing_off or not replaying else None
+            items = self._drain(self.batch_size, timeout=timeout)
+
+            # While backing off or while older events are spooled, new events
+            # join the end of the spool so delivery order is preserved
+            if backing_off or replaying:
+                self.spool.append(items)
+                self.spooled += len(items)
+                if backing_off:
+                    continue
+                batch = self.spool.peek(self.batch_size)
+                if self._deliver(batch):
+                    self.spool.remove(batch)
+            elif items and not self._deliver(items):
+                self.spool.append(items)
+                self.spooled += len(items)
+
+        with self.close_lock:
+            self.finished = True
+            close_pending = self.close_pending
+        if close_pending:
+            self._shutdown()
+
+    def _deliver(self, batch):
+        """Send one batch, updating counters and the backoff schedule"""
+        if not batch:
+            return True
+
+        with STAGE_SECONDS.labels('all', 'send_events').time():
+            sent = self.api_client.send_events([(event_data, image) for _, _, event_data, image in batch])
+
+        if sent:
+            now = time.time()
+            for _, queued_at, _, _ in batch:
+                latency = now - queued_at
+                self.total_latency += latency
+                self.max_latency = max(self.max_latency, latency)
+                self.last_latency = latency
+                DELIVERY_LATENCY.observe(latency)
+            self.delivered += len(batch)
+            EVENTS_DELIVERED.inc(len(batch))
+            self.retry_delay = 0
+            self.next_attempt = 0
+            return True
+
+        self.failed_attempts += 1
+        EVENTS_FAILED.inc(len(batch))
+        if self.retry_delay:
+            self.retry_delay = min(self.retry_delay * 2, self.retry_max_seconds)
+        else:
+            self.retry_delay = self.retry_base_seconds
+        self.next_attempt = time.time() + self.retry_delay
+        logger.warning(f"⏳ Delivery of {len(batch)} events failed, "
+                       f"retrying in {self.retry_delay:.0f}s")
+        return False
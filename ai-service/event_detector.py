@@ -1,125 +1,208 @@
 import time
 from datetime import datetime, timedelta
 import logging
+import numpy as np
+from tracker import MultiObjectTracker, iou_matrix
+from config import (TRACKER_IOU_THRESHOLD, TRACK_MIN_HITS, TRACK_MAX_MISSES,
+                    LOITERING_SECONDS, UNATTENDED_OBJECT_SECONDS, EVENT_COOLDOWN_SECONDS)
 
 logger = logging.getLogger(__name__)
 
 class EventDetector:
     def __init__(self):
         """Initialize event detection logic"""
-        self.previous_detections = []
-        self.person_tracking = {}
+        self.tracker = MultiObjectTracker(
+            iou_threshold=TRACKER_IOU_THRESHOLD,
+            min_hits=TRACK_MIN_HITS,
+            max_misses=TRACK_MAX_MISSES
+        )
         self.last_event_time = {}
-        self.event_cooldown = 5  # seconds between similar events
+        self.event_cooldown = EVENT_COOLDOWN_SECONDS  # seconds between similar events
+        self.loitering_seconds = LOITERING_SECONDS
+        self.unattended_object_seconds = UNATTENDED_OBJECT_SECONDS
         
+    def snapshot(self):
+        """Tracker and cooldown state, for warm restarts"""
+        return {'tracker': self.tracker.snapshot(), 'lastEventTime': dict(self.last_event_time)}
+    
+    def restore(self, state):
+        """Resume from a snapshot so restarts neither re-announce tracked people nor reset cooldowns"""
+        self.tracker.restore(state.get('tracker', {}))
+        self.last_event_time.update(state.get('lastEventTime', {}))
+    
     def detect_events(self, current_detections, frame_shape):
-        """Detect events based on current and previous detections"""
+        """Detect events from the lifecycle of tracked objects"""
         events = []
         current_time = time.time()
         
-        # Count current objects
-        current_people = [d for d in current_detections if d['class_name'] == 'person']
-        current_objects = [d for d in current_detections if d['class_name'] != 'person']
-        
-        # Count previous objects
-        prev_people = [d for d in self.previous_detections if d['class_name'] == 'person']
-        prev_objects = [d for d in self.previous_detections if d['class_name'] != 'person']
+        # Update tracks with the current detections
+        born, died = self.tracker.update(current_detections, current_time)
+        people = self.tracker.confirmed_tracks('person')
         
         # Detect person entry/exit
-        person_events = self._detect_person_events(current_people, prev_people, current_time)
+        person_events = self._detect_person_events(born, died, people, current_time)
         events.extend(person_events)
         
+        # Detect loitering
+        events.extend(self._detect_loitering(people, current_time))
+        
         # Detect object changes
-        object_events = self._detect_object_events(current_objects, prev_objects, current_time)
+        object_events = self._detect_object_events(born, died, people, current_time)
         events.extend(object_events)
         
         # Detect multiple people
-        multiple_people_event = self._detect_multiple_people(current_people, current_time)
+        multiple_people_event = self._detect_multiple_people(people, current_time)
         if multiple_people_event:
             events.append(multiple_people_event)
         
-        # Update previous detections
-        self.previous_detections = current_detections.copy()
-        
         return events
     
-    def _detect_person_events(self, current_people, prev_people, current_time):
-        """Detect person entry and exit events"""
+    def _detect_person_events(self, born, died, people, current_time):
+        """Detect person entry and exit events from track births and deaths"""
         events = []
         
         # Person entered
-        if len(current_people) > len(prev_people):
-            if self._can_trigger_event('person_entered', current_time):
-                event = {
-                    'type': 'person_entered',
-                    'description': f"A person entered the monitored area. Total people: {len(current_people)}",
-                    'confidence': 0.8,
-                    'timestamp': current_time
-                }
-                events.append(event)
-                self.last_event_time['person_entered'] = current_time
+        entered = [t for t in born if t.class_name == 'person']
+        if entered and self._can_trigger_event('person_entered', current_time):
+            event = {
+                'type': 'person_entered',
+                'description': f"A person entered the monitored area. Total people: {len(people)}",
+                'confidence': max(t.score for t in entered),
+                'timestamp': current_time,
+                'trackIds': [t.track_id for t in entered],
+                'zone': self._zone_of(entered)
+            }
+            events.append(event)
+            self.last_event_time['person_entered'] = current_time
         
         # Person exited
-        elif len(current_people) < len(prev_people):
-            if self._can_trigger_event('person_exited', current_time):
-                event = {
-                    'type': 'person_exited',
-                    'description': f"A person left the monitored area. Total people: {len(current_people)}",
-                    'confidence': 0.8,
-                    'timestamp': current_time
-                }
-                events.append(event)
-                self.last_event_time['person_exited'] = current_time
+        exited = [t for t in died if t.class_name == 'person']
+        if exited and self._can_trigger_event('person_exited', current_time):
+            event = {
+                'type': 'person_exited',
+                'description': f"A person left the monitored area. Total people: {len(people)}",
+                'confidence': 0.8,
+                'timestamp': current_time,
+                'duration': max(t.dwell_time for t in exited),
+                'trackIds': [t.track_id for t in exited],
+                'zone': self._zone_of(exited)
+            }
+            events.append(event)
+            self.last_event_time['person_exited'] = current_time
         
         return events
     
-    def _detect_object_events(self, current_objects, prev_objects, current_time):
-        """Detect object-related events"""
+    def _detect_loitering(self, people, current_time):
+        """Detect people who stay in view longer than the loitering threshold"""
         events = []
         
-        # New objects detected
-        current_classes = set([obj['class_name'] for obj in current_objects])
-        prev_classes = set([obj['class_name'] for obj in prev_objects])
+        for track in people:
+            if 'loitering' in track.flags or track.dwell_time < self.loitering_seconds:
+                continue
+            if not self._can_trigger_event('loitering', current_time):
+                break
+            track.flags.add('loitering')
+            events.append({
+                'type': 'loitering',
+                'description': f"A person has been in the area for {track.dwell_time:.0f} seconds",
+                'confidence': track.score,
+                'timestamp': current_time,
+                'duration': track.dwell_time,
+                'trackIds': [track.track_id],
+                'zone': track.zone
+            })
+            self.last_event_time['loitering'] = current_time
+        
+        return events
+    
+    def _detect_object_events(self, born, died, people, current_time):
+        """Detect object-related events"""
+        events = []
         
-        new_objects = current_classes - prev_classes
-        removed_objects = prev_classes - current_classes
+        placed = [t for t in born if t.class_name != 'person']
+        picked = [t for t in died if t.class_name != 'person']
         
         # Object picked up / removed
-        if removed_objects and self._can_trigger_event('object_picked', current_time):
+        if picked and self._can_trigger_event('object_picked', current_time):
             event = {
                 'type': 'object_picked',
-                'description': f"Objects were removed: {', '.join(removed_objects)}",
+                'description': f"Objects were removed: {', '.join(sorted(set(t.class_name for t in picked)))}",
                 'confidence': 0.7,
-                'timestamp': current_time
+                'timestamp': current_time,
+                'duration': max(t.dwell_time for t in picked),
+                'trackIds': [t.track_id for t in picked],
+                'zone': self._zone_of(picked)
             }
             events.append(event)
             self.last_event_time['object_picked'] = current_time
         
         # Object placed / added
-        if new_objects and self._can_trigger_event('object_placed', current_time):
+        if placed and self._can_trigger_event('object_placed', current_time):
             event = {
                 'type': 'object_placed',
-                'description': f"New objects detected: {', '.join(new_objects)}",
+                'description': f"New objects detected: {', '.join(sorted(set(t.class_name for t in placed)))}",
                 'confidence': 0.7,
-                'timestamp': current_time
+                'timestamp': current_time,
+                'trackIds': [t.track_id for t in placed],
+                'zone': self._zone_of(placed)
             }
             events.append(event)
             self.last_event_time['object_placed'] = current_time
         
+        # Object left behind with nobody next to it
+        unattended = self._find_unattended_objects(people)
+        if unattended and self._can_trigger_event('unusual_activity', current_time):
+            for track in unattended:
+                track.flags.add('unattended')
+            event = {
+                'type': 'unusual_activity',
+                'description': f"Objects left unattended: {', '.join(sorted(set(t.class_name for t in unattended)))}",
+                'confidence': 0.6,
+                'timestamp': current_time,
+                'duration': max(t.dwell_time for t in unattended),
+                'trackIds': [t.track_id for t in unattended],
+                'zone': self._zone_of(unattended)
+            }
+            events.append(event)
+            self.last_event_time['unusual_activity'] = current_time
+        
         return events
     
-    def _detect_multiple_people(self, current_people, current_time):
+    def _find_unattended_objects(self, people):
+        """Objects present for a while with no person overlapping their surroundings"""
+        candidates = [t for t in self.tracker.confirmed_tracks()
+                      if t.class_name != 'person' and 'unattended' not in t.flags
+                      and t.dwell_time >= self.unattended_object_seconds]
+        if not candidates:
+            return []
+        
+        # Grow each object box by its own size before checking for nearby people
+        boxes = np.array([t.box for t in candidates], dtype=np.float32)
+        size = np.concatenate([boxes[:, 2:] - boxes[:, :2]] * 2, axis=1)
+        surroundings = boxes + size * np.array([-1, -1, 1, 1], dtype=np.float32)
+        person_boxes = np.array([t.box for t in people], dtype=np.float32).reshape(-1, 4)
+        attended = (iou_matrix(surroundings, person_boxes) > 0).any(axis=1)
+        return [t for t, is_attended in zip(candidates, attended.tolist()) if not is_attended]
+    
+    def _detect_multiple_people(self, people, current_time):
         """Detect when multiple people are present"""
-        if len(current_people) >= 3:
+        if len(people) >= 3:
             if self._can_trigger_event('multiple_people', current_time):
+                self.last_event_time['multiple_people'] = current_time
                 return {
                     'type': 'multiple_people',
-                    'description': f"Multiple people detected in the area ({len(current_people)} people)",
+                    'description': f"Multiple people detected in the area ({len(people)} people)",
                     'confidence': 0.9,
-                    'timestamp': current_time
+                    'timestamp': current_time,
+                    'zone': self._zone_of(people)
                 }
         return None
     
+    def _zone_of(self, tracks):
+        """ROI zone(s) the given tracks were last seen in"""
+        zones = sorted(set(t.zone for t in tracks if t.zone))
+        return ', '.join(zones) if zones else None
+    
     def _can_trigger_event(self, event_type, current_time):
         """Check if enough time has passed to trigger the same event type"""
         last_time = self.last_event_time.get(event_type, 0)
@@ -0,0 +1,180 @@
+import os
+import glob
+import time
+import threading
+import logging
+import cv2
+
+logger = logging.getLogger(__name__)
+
+IMAGE_PATTERNS = ('*.jpg', '*.jpeg', '*.png', '*.bmp')
+
+def is_live(source):
+    """Device indexes and network streams are live; files and directories are not"""
+    return isinstance(source, int) or '://' in str(source)
+
+class FrameSource:
+    """Frame producer with split grab()/retrieve() so unused frames are never decoded
+
+    grab() advances to the next frame and timestamps it; retrieve() decodes
+    the grabbed frame. read() does both, like cv2.VideoCapture.read().
+    """
+    timestamp = 0.0
+
+    def isOpened(self):
+        return True
+
+    def set(self, prop, value):
+        return False
+
+    def grab(self):
+        raise NotImplementedError
+
+    def retrieve(self):
+        raise NotImplementedError
+
+    def read(self):
+        if not self.grab():
+            return False, None
+        return self.retrieve()
+
+    def interrupt(self):
+        """Abort a pending reconnect so the capture thread can stop"""
+
+    def release(self):
+        pass
+
+class VideoCaptureSource(FrameSource):
+    def __init__(self, source, width=640, height=480, fps=30, reconnect_max_seconds=30):
+        """Webcam, RTSP/HTTP stream or video file through cv2.VideoCapture
+
+        Live sources are reopened with exponential backoff after a drop;
+        for video files a failed grab means the end of the file.
+        """
+        self.source = source
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.live = is_live(source)
+        self.reconnect_max_seconds = reconnect_max_seconds
+        self.stop_event = threading.Event()
+        self.reconnects = 0
+        self.cap = None
+        self._open()
+
+    def _open(self):
+        self.cap = cv2.VideoCapture(self.source)
+        if isinstance(self.source, int):
+            # Only local devices take capture properties
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+            self.cap.set(cv2.CAP_PROP_FPS, self.fps)
+        elif self.live:
+            # Keep the driver queue short so grabbed frames are fresh
+            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        return self.cap.isOpened()
+
+    def isOpened(self):
+        return self.cap is not None and self.cap.isOpened()
+
+    def set(self, prop, value):
+        return self.cap.set(prop, value)
+
+    def grab(self):
+        if self.cap.grab():
+            self.timestamp = time.time()
+            return True
+        if not self.live or not self._reconnect():
+            return False
+        self.timestamp = time.time()
+        return True
+
+    def _reconnect(self):
+        """Reopen a dropped live source until it works or the source is interrupted"""
+        delay = 0.5
+        while not self.stop_event.is_set():
+            logger.warning(f"⚠️ Lost source {self.source}, reconnecting in {delay:.1f}s")
+            if self.stop_event.wait(delay):
+                break
+            self.cap.release()
+            if self._open() and self.cap.grab():
+                self.reconnects += 1
+                logger.info(f"🔌 Reconnected to {self.source}")
+                return True
+            delay = min(delay * 2, self.reconnect_max_seconds)
+        return False
+
+    def retrieve(self):
+        return self.cap.retrieve()
+
+    def interrupt(self):
+        self.stop_event.set()
+
+    def release(self):
+        self.stop_event.set()
+        if self.cap is not None:
+            self.cap.release()
+
+class ImageDirectorySource(FrameSource):
+    def __init__(self, directory, loop=1):
+        """Replay the images of a directory in name order; grab() only moves the index"""
+        self.paths = sorted(p for pattern in IMAGE_PATTERNS for p in glob.glob(os.path.join(directory, pattern)))
+        self.loop = loop
+        self.index = -1
+
+    def isOpened(self):
+        return bool(self.paths)
+
+    def grab(self):
+        if self.index + 1 >= len(self.paths) * self.loop:
+            return False
+        self.index += 1
+        self.timestamp = time.time()
+        return True
+
+    def retrieve(self):
+        frame = cv2.imread(self.paths[self.index % len(self.paths)])
+        return frame is not None, frame
+
+class CaptureAdapter(FrameSource):
+    def __init__(self, capture):
+        """Wrap an injected cv2.VideoCapture-like object, timestamping its frames
+
+        Captures without grab()/retrieve() are read (and decoded) in grab().
+        """
+        self.capture = capture
+        self.split = hasattr(capture, 'grab') and hasattr(capture, 'retrieve')
+        self.frame = None
+
+    def isOpened(self):
+        return self.capture.isOpened()
+
+    def set(self, prop, value):
+        return self.capture.set(prop, value)
+
+    def grab(self):
+        self.timestamp = time.time()
+        if self.split:
+            return self.capture.grab()
+        ok, self.frame = self.capture.read()
+        return ok
+
+    def retrieve(self):
+        if self.split:
+            return self.capture.retrieve()
+        return self.frame is not None, self.frame
+
+    def release(self):
+        self.capture.release()
+
+def as_frame_source(capture):
+    """Use an injected capture as a frame source"""
+    if isinstance(capture, FrameSource):
+        return capture
+    return CaptureAdapter(capture)
+
+def open_source(source, width=640, height=480, fps=30, reconnect_max_seconds=30):
+    """Open a device index, stream URL, video file or image directory"""
+    if isinstance(source, str) and os.path.isdir(source):
+        return ImageDirectorySource(source)
+    return VideoCaptureSource(source, width, height, fps, reconnect_max_seconds)
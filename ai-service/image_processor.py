@@ -2,8 +2,11 @@ import cv2
 import os
 import base64
 from datetime import datetime
-from PIL import Image
 import logging
+from config import (IMAGE_QUALITY, JPEG_MIN_QUALITY, MAX_IMAGE_SIZE_KB, IMAGE_QUOTA_MB,
+                    IMAGE_DEDUP_DISTANCE, IMAGE_DEDUP_WINDOW_SECONDS, IMAGE_DEDUP_CACHE_MB)
+from image_store import ImageStore, scene_key
+from metrics import STAGE_SECONDS
 
 logger = logging.getLogger(__name__)
 
@@ -11,8 +14,20 @@ class ImageProcessor:
     def __init__(self):
         """Initialize image processor"""
         self.save_path = os.getenv('IMAGE_SAVE_PATH', '../uploads/events/')
+        self.quality = IMAGE_QUALITY
+        self.min_quality = JPEG_MIN_QUALITY
+        self.max_size_kb = MAX_IMAGE_SIZE_KB
         self.ensure_directory_exists()
         
+        # Content-addressed storage; disk writes happen off the event path
+        self.store = ImageStore(
+            self.save_path,
+            quota_mb=IMAGE_QUOTA_MB,
+            dedup_distance=IMAGE_DEDUP_DISTANCE,
+            dedup_window_seconds=IMAGE_DEDUP_WINDOW_SECONDS,
+            cache_mb=IMAGE_DEDUP_CACHE_MB
+        )
+        
     def ensure_directory_exists(self):
         """Create directory structure if it doesn't exist"""
         try:
@@ -21,42 +36,88 @@ class ImageProcessor:
         except Exception as e:
             logger.error(f"❌ Error creating directory: {e}")
     
-    def save_event_image(self, frame, detections, event):
-        """Save image with event information"""
+    def save_event_image(self, frame, detections, event, camera_id='all'):
+        """Encode the event image once and write it to disk in the background
+        
+        Returns (filepath, jpeg_bytes) so the same bytes can be uploaded. A
+        recent image of the same camera, event type and detections whose
+        frame is near-identical is reused instead.
+        """
         try:
-            # Generate filename
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            event_type = event['type']
-            filename = f"event_{timestamp}_{event_type}.jpg"
-            filepath = os.path.join(self.save_path, filename)
+            # Skip drawing, encoding and writing when the scene has not changed
+            with STAGE_SECONDS.labels(camera_id, 'dedup').time():
+                key = scene_key(camera_id, event['type'], detections, frame.shape)
+                image_hash = self.store.fingerprint(frame)
+                duplicate = self.store.lookup(key, image_hash) if IMAGE_DEDUP_DISTANCE >= 0 else None
+            if duplicate is not None:
+                logger.info(f"♻️ Reusing near-duplicate image: {os.path.basename(duplicate[0])}")
+                return duplicate
             
             # Draw bounding boxes on image
-            annotated_frame = self.draw_detections(frame.copy(), detections)
-            
-            # Save image
-            cv2.imwrite(filepath, annotated_frame)
+            with STAGE_SECONDS.labels(camera_id, 'draw_detections').time():
+                annotated_frame = self.draw_detections(frame.copy(), detections)
             
-            # Compress image if too large
-            self.compress_image(filepath)
+            # Encode within the size budget, then save asynchronously
+            with STAGE_SECONDS.labels(camera_id, 'encode').time():
+                image_bytes = self.encode_jpeg(annotated_frame)
+            filepath = self.store.put(key, image_hash, image_bytes)
             
-            logger.info(f"💾 Saved event image: {filename}")
-            return filepath
+            logger.info(f"💾 Saved {event['type']} image: {os.path.relpath(filepath, self.save_path)} "
+                        f"({len(image_bytes) / 1024:.1f}KB)")
+            return filepath, image_bytes
             
         except Exception as e:
             logger.error(f"❌ Error saving image: {e}")
-            return None
+            return None, None
     
-    def draw_detections(self, frame, detections):
-        """Draw bounding boxes and labels on frame"""
-        for detection in detections:
-            bbox = detection['bbox']
-            class_name = detection['class_name']
-            confidence = detection['confidence']
+    def encode_jpeg(self, image, max_size_kb=None, max_downscale_steps=3):
+        """Encode an image to JPEG in memory, fitting the size budget
+        
+        Tries the configured quality first, then a bounded binary search down
+        to the minimum quality, and finally steps the resolution down.
+        """
+        max_bytes = (max_size_kb or self.max_size_kb) * 1024
+        
+        for _ in range(max_downscale_steps + 1):
+            encoded = self._encode(image, self.quality)
+            if len(encoded) <= max_bytes:
+                return encoded
             
-            # Extract coordinates
-            x1, y1 = int(bbox['x1']), int(bbox['y1'])
-            x2, y2 = int(bbox['x2']), int(bbox['y2'])
+            best = None
+            low, high = self.min_quality, self.quality - 1
+            while low <= high:
+                quality = (low + high) // 2
+                candidate = self._encode(image, quality)
+                if len(candidate) <= max_bytes:
+                    best = candidate
+                    low = quality + 1
+                else:
+                    high = quality - 1
+            if best is not None:
+                return best
             
+            # Even the minimum quality is too large, lose resolution instead
+            image = cv2.resize(image, None, fx=0.75, fy=0.75, interpolation=cv2.INTER_AREA)
+        
+        logger.warning(f"⚠️ Could not fit image into {max_bytes / 1024:.0f}KB")
+        return self._encode(image, self.min_quality)
+    
+    def _encode(self, image, quality):
+        """Encode an image to JPEG bytes at the given quality"""
+        ok, buffer = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        if not ok:
+            raise ValueError("JPEG encoding failed")
+        return buffer.tobytes()
+    
+    def close(self):
+        """Wait for pending image writes to finish"""
+        self.store.close()
+    
+    def draw_detections(self, frame, detections):
+        """Draw bounding boxes and labels on frame"""
+        boxes = detections.boxes.astype(int).tolist()
+        for (x1, y1, x2, y2), confidence, class_name in zip(
+                boxes, detections.scores.tolist(), detections.class_names):
             # Choose color based on class
             color = self.get_class_color(class_name)
             
@@ -94,29 +155,6 @@ class ImageProcessor:
         }
         return colors.get(class_name, (128, 128, 128))  # Gray for unknown
     
-    def compress_image(self, filepath, max_size_kb=200):
-        """Compress image to reduce file size"""
-        try:
-            # Check current file size
-            current_size = os.path.getsize(filepath) / 1024  # KB
-            
-            if current_size > max_size_kb:
-                # Open and compress image
-                img = Image.open(filepath)
-                
-                # Calculate compression quality
-                quality = int(85 * (max_size_kb / current_size))
-                quality = max(20, min(95, quality))  # Ensure quality is between 20-95
-                
-                # Save compressed image
-                img.save(filepath, 'JPEG', quality=quality, optimize=True)
-                
-                new_size = os.path.getsize(filepath) / 1024
-                logger.info(f"🗜️ Compressed image: {current_size:.1f}KB → {new_size:.1f}KB")
-                
-        except Exception as e:
-            logger.error(f"❌ Error compressing image: {e}")
-    
     def image_to_base64(self, filepath):
         """Convert image to base64 string"""
         try:
@@ -0,0 +1,189 @@
+import os
+import cv2
+import time
+import hashlib
+import threading
+import logging
+import numpy as np
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from metrics import REGISTRY
+
+IMAGES_DEDUPLICATED = REGISTRY.counter(
+    'surveillance_images_deduplicated_total', 'Event images replaced by a recent near-duplicate', ('camera',))
+DEDUP_BYTES_SAVED = REGISTRY.counter(
+    'surveillance_image_dedup_bytes_saved_total', 'Image bytes not encoded or written thanks to deduplication')
+IMAGES_EVICTED = REGISTRY.counter(
+    'surveillance_images_evicted_total', 'Event images deleted to stay within the disk quota')
+
+logger = logging.getLogger(__name__)
+
+def dhash(image, size=16):
+    """Difference hash of an image: brightness gradients of a (size+1)xsize thumbnail (256 bits)"""
+    gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (size + 1, size), interpolation=cv2.INTER_AREA)
+    bits = small[:, 1:] > small[:, :-1]
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+def scene_key(camera_id, event_type, detections, frame_shape, grid=4):
+    """What an event image must show to be reused: camera, event type and a coarse box signature
+
+    Each detection contributes its class and the grid cell of its box
+    centre, so an added, removed or moved object changes the key.
+    """
+    if detections is None or not len(detections):
+        return camera_id, event_type, ()
+    height, width = frame_shape[:2]
+    centers = (detections.boxes[:, :2] + detections.boxes[:, 2:]) * 0.5
+    cols = np.clip((centers[:, 0] * grid / width).astype(np.int64), 0, grid - 1)
+    rows = np.clip((centers[:, 1] * grid / height).astype(np.int64), 0, grid - 1)
+    signature = tuple(sorted(zip(detections.class_ids.tolist(), rows.tolist(), cols.tolist())))
+    return camera_id, event_type, signature
+
+class ImageStore:
+    def __init__(self, root, quota_mb=1024, dedup_distance=12, dedup_window_seconds=300, cache_mb=16):
+        """Content-addressed event image store with near-duplicate reuse and a disk quota
+
+        Images are named by the SHA-1 of their bytes and sharded into
+        YYYY/MM/DD directories. A recent image with the same scene key
+        (camera, event type, detections) whose perceptual hash is within
+        dedup_distance bits of the new frame's is reused instead. Files
+        are written, counted and evicted (oldest first) on one writer thread.
+        """
+        self.root = root
+        self.quota_bytes = int(quota_mb * 1024 * 1024)
+        self.dedup_distance = dedup_distance
+        self.dedup_window = dedup_window_seconds
+        self.cache_bytes = int(cache_mb * 1024 * 1024)
+
+        # Recent images: path -> (scene key, hash, stored_at, jpeg bytes), oldest first
+        self.cache = OrderedDict()
+        self.cached_bytes = 0
+        self.lock = threading.Lock()
+        self.duplicates = 0
+        self.bytes_saved = 0
+
+        # Files on disk, oldest first; only touched by the writer thread
+        self.files = deque()
+        self.disk_bytes = 0
+
+        os.makedirs(root, exist_ok=True)
+        self.writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='image-writer')
+        self.writer.submit(self._scan)
+
+    def fingerprint(self, frame):
+        """Perceptual hash used for duplicate detection"""
+        return dhash(frame)
+
+    def lookup(self, key, image_hash):
+        """(path, jpeg bytes) of a recent near-identical image with the same scene key, or None"""
+        now = time.time()
+        with self.lock:
+            for path, (cached_key, cached_hash, stored_at, data) in reversed(self.cache.items()):
+                if now - stored_at > self.dedup_window:
+                    break
+                if cached_key == key and hamming(cached_hash, image_hash) <= self.dedup_distance:
+                    self.duplicates += 1
+                    self.bytes_saved += len(data)
+                    IMAGES_DEDUPLICATED.labels(key[0]).inc()
+                    DEDUP_BYTES_SAVED.inc(len(data))
+                    return path, data
+        return None
+
+    def put(self, key, image_hash, data):
+        """Store encoded image bytes and return their path; the write happens in the background"""
+        digest = hashlib.sha1(data).hexdigest()
+        shard = time.strftime('%Y/%m/%d')
+        path = os.path.join(self.root, shard, f"{digest}.jpg")
+
+        with self.lock:
+            previous = self.cache.pop(path, None)
+            if previous is not None:
+                self.cached_bytes -= len(previous[3])
+            self.cache[path] = (key, image_hash, time.time(), data)
+            self.cached_bytes += len(data)
+            while self.cached_bytes > self.cache_bytes and len(self.cache) > 1:
+                _, (_, _, _, old) = self.cache.popitem(last=False)
+                self.cached_bytes -= len(old)
+
+        self.writer.submit(self._write, path, data)
+        return path
+
+    def stats(self):
+        return {
+            'files': len(self.files),
+            'disk_mb': round(self.disk_bytes / (1024 * 1024), 1),
+            'duplicates': self.duplicates,
+            'bytes_saved': self.bytes_saved,
+        }
+
+    def close(self):
+        """Wait for pending writes to finish"""
+        self.writer.shutdown(wait=True)
+
+    def _scan(self):
+        """Index the images already on disk (including older flat layouts), oldest first"""
+        found = []
+        for directory, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                if not filename.lower().endswith('.jpg'):
+                    continue
+                path = os.path.join(directory, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                found.append((stat.st_mtime, path, stat.st_size))
+        found.sort()
+        self.files.extend((path, size) for _, path, size in found)
+        self.disk_bytes += sum(size for _, _, size in found)
+        logger.info(f"📁 Image store: {len(found)} image(s), {self.disk_bytes / (1024 * 1024):.1f}MB "
+                    f"of {self.quota_bytes / (1024 * 1024):.0f}MB quota")
+        self._enforce_quota()
+
+    def _write(self, path, data):
+        """Write image bytes unless identical content is already stored"""
+        try:
+            if os.path.exists(path):
+                return
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(data)
+            self.files.append((path, len(data)))
+            self.disk_bytes += len(data)
+            self._enforce_quota()
+        except Exception as e:
+            logger.error(f"❌ Error writing image {path}: {e}")
+
+    def _enforce_quota(self):
+        """Delete the oldest images until the store fits its quota"""
+        while self.disk_bytes > self.quota_bytes and len(self.files) > 1:
+            path, size = self.files.popleft()
+            self.disk_bytes -= size
+            try:
+                os.remove(path)
+                IMAGES_EVICTED.inc()
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.error(f"❌ Error evicting image {path}: {e}")
+                continue
+            with self.lock:
+                entry = self.cache.pop(path, None)
+                if entry is not None:
+                    self.cached_bytes -= len(entry[3])
+            self._remove_empty_dirs(os.path.dirname(path))
+
+    def _remove_empty_dirs(self, directory):
+        """Remove date shard directories left empty by eviction"""
+        root = os.path.abspath(self.root)
+        directory = os.path.abspath(directory)
+        while directory.startswith(root) and directory != root:
+            try:
+                os.rmdir(directory)
+            except OSError:
+                return
+            directory = os.path.dirname(directory)
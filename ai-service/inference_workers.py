@@ -0,0 +1,313 @@
+import os
+import time
+import queue
+import threading
+import logging
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import numpy as np
+from models import DetectionBatch
+from metrics import STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+def _worker_main(model_factory, shm_name, slot_bytes, tasks, results, batch_size, conf, threads, warmup):
+    """Worker process: run the model on frames read straight from the shared-memory slots"""
+    import cv2
+    cv2.setNumThreads(1)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        try:
+            model = model_factory()
+            if warmup and hasattr(model, 'warmup'):
+                model.warmup(batch_size=1)
+        except Exception as e:
+            results.put(('failed', os.getpid(), repr(e)))
+            return
+        results.put(('ready', os.getpid(), dict(model.names)))
+
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            # Take whatever else is already waiting, up to one batch
+            jobs = [task]
+            while len(jobs) < batch_size:
+                try:
+                    task = tasks.get_nowait()
+                except queue.Empty:
+                    break
+                if task is None:
+                    tasks.put(None)  # leave the stop signal for the next loop
+                    break
+                jobs.append(task)
+            # Tell the parent which tasks die with this process if it crashes
+            results.put(('taken', os.getpid(), [job[0] for job in jobs]))
+
+            # The quality controller may have changed the input size
+            imgsz = jobs[-1][4]
+            if imgsz and hasattr(model, 'set_imgsz'):
+                model.set_imgsz(imgsz)
+
+            inputs, owners = [], []
+            for index, (task_id, slot, shape, crops, _) in enumerate(jobs):
+                frame = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=slot * slot_bytes)
+                for x1, y1, x2, y2 in crops:
+                    inputs.append(frame[y1:y2, x1:x2])
+                    owners.append((index, x1, y1))
+
+            start = time.perf_counter()
+            try:
+                outputs = model(inputs, conf=conf, verbose=False)
+                error = None
+            except Exception as e:
+                outputs, error = [], str(e)
+            elapsed = time.perf_counter() - start
+
+            # Only compact (N, 7) arrays travel back, already in frame coordinates:
+            # x1, y1, x2, y2, score, class and the index of the crop they came from
+            parts = [[] for _ in jobs]
+            for (index, x1, y1), output in zip(owners, outputs):
+                data = DetectionBatch.from_result(output, model.names).offset(x1, y1)
+                source = np.full(len(data), len(parts[index]), dtype=np.float32)
+                parts[index].append(np.column_stack([data.boxes, data.scores, data.class_ids, source]))
+            for (task_id, slot, _, _, _), arrays in zip(jobs, parts):
+                data = np.concatenate(arrays) if arrays else np.empty((0, 7), dtype=np.float32)
+                results.put(('result', os.getpid(), task_id, slot, None if error else data, elapsed, error))
+    finally:
+        shm.close()
+
+class InferencePool:
+    def __init__(self, workers, model_factory, on_result, batch_size=8, conf=0.5,
+                 slots=0, slot_mb=8, warmup=True, start_timeout=300, merge=None):
+        """Run the model in worker processes fed through shared-memory frame slots
+
+        Frames are copied once into a free slot and only the slot index
+        travels through the task queue. Results are handed to
+        on_result(camera, frame, captured_at, detections) from a single
+        collector thread, in capture order per camera. merge(parts, crops,
+        frame_shape) joins the per-crop detections of a frame (default:
+        concatenate them). Frames held by a worker that dies are dropped so
+        the other workers carry on.
+        """
+        self.workers = workers
+        self.batch_size = batch_size
+        self.slot_count = slots or 2 * workers
+        self.slot_bytes = int(slot_mb * 1024 * 1024)
+        self.on_result = on_result
+        self.merge = merge
+        self.start_timeout = start_timeout
+        self.names = None
+        self.imgsz = None  # input size override sent along with every task
+
+        self.context = mp.get_context('spawn')
+        self.shm = shared_memory.SharedMemory(create=True, size=self.slot_count * self.slot_bytes)
+        self.tasks = self.context.Queue()
+        self.results = self.context.Queue()
+        self.free_slots = list(range(self.slot_count))
+        self.slot_condition = threading.Condition()
+
+        # task_id -> (camera, frame, captured_at, sequence, crops, slot); per camera reorder state
+        self.pending = {}
+        self.in_flight = {}  # worker pid -> task ids it has taken
+        self.next_task_id = 0
+        self.next_sequence = {}
+        self.expected = {}
+        self.reorder = {}
+
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        self.processes = [
+            self.context.Process(
+                target=_worker_main, name=f'inference-worker-{i}', daemon=True,
+                args=(model_factory, self.shm.name, self.slot_bytes, self.tasks, self.results,
+                      batch_size, conf, threads, warmup))
+            for i in range(workers)
+        ]
+        self.alive = []
+        self.next_health_check = 0.0
+        self.closing = False
+        self.collector = None
+        self.stop_event = threading.Event()
+
+    def start(self):
+        """Start the workers and wait until every one has loaded its model"""
+        for process in self.processes:
+            process.start()
+        deadline = time.monotonic() + self.start_timeout
+        ready = 0
+        while ready < self.workers:
+            dead = [p for p in self.processes if p.exitcode is not None]
+            if dead:
+                self._abort()
+                raise RuntimeError(f"{dead[0].name} exited with code {dead[0].exitcode} while loading the model")
+            if time.monotonic() > deadline:
+                self._abort()
+                raise TimeoutError(f"Inference workers not ready after {self.start_timeout}s")
+            try:
+                message = self.results.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if message[0] == 'failed':
+                self._abort()
+                raise RuntimeError(f"Inference worker could not load the model: {message[2]}")
+            if message[0] == 'ready':
+                ready += 1
+                self.names = message[2]
+        self.alive = list(self.processes)
+        logger.info(f"🧵 {self.workers} inference worker process(es) ready, "
+                    f"{self.slot_count} shared-memory slot(s) of {self.slot_bytes // (1024 * 1024)} MB")
+
+        self.stop_event.clear()
+        self.collector = threading.Thread(target=self._collect, name='inference-results', daemon=True)
+        self.collector.start()
+
+    def submit(self, camera, frame, captured_at, crops, timeout=1.0):
+        """Copy a frame into a free slot and queue it; False if no slot freed up in time"""
+        if not self.alive:
+            return False
+        if frame.nbytes > self.slot_bytes:
+            logger.error(f"❌ Frame of {camera.location} ({frame.nbytes} bytes) exceeds the inference slot size")
+            return False
+        with self.slot_condition:
+            if not self.slot_condition.wait_for(lambda: self.free_slots, timeout=timeout):
+                return False
+            slot = self.free_slots.pop()
+
+        view = np.ndarray(frame.shape, dtype=np.uint8, buffer=self.shm.buf, offset=slot * self.slot_bytes)
+        np.copyto(view, frame)
+        del view
+
+        task_id = self.next_task_id
+        self.next_task_id += 1
+        sequence = self.next_sequence.get(camera.camera_id, 0)
+        self.next_sequence[camera.camera_id] = sequence + 1
+        crops = list(crops)
+        self.pending[task_id] = (camera, frame, captured_at, sequence, crops, slot)
+        self.tasks.put((task_id, slot, frame.shape, crops, self.imgsz))
+        return True
+
+    def _collect(self):
+        """Collector thread: release slots and deliver results in per-camera order"""
+        while not self.stop_event.is_set() or self.pending:
+            self._check_workers()
+            try:
+                message = self.results.get(timeout=0.5)
+            except queue.Empty:
+                if self.stop_event.is_set():
+                    break
+                continue
+            if message[0] == 'taken':
+                self.in_flight.setdefault(message[1], set()).update(message[2])
+                continue
+            if message[0] != 'result':
+                continue
+            _, pid, task_id, slot, data, elapsed, error = message
+            self.in_flight.get(pid, set()).discard(task_id)
+            if task_id not in self.pending:
+                continue  # already given up on
+            camera, frame, captured_at, sequence, crops, _ = self.pending.pop(task_id)
+            self._free_slot(slot)
+
+            STAGE_SECONDS.labels(camera.camera_id, 'inference').observe(elapsed)
+            if error:
+                logger.error(f"❌ Inference worker failed on {camera.location}: {error}")
+            detections = None if data is None else self._detections(data, crops, frame.shape)
+            self._deliver(camera, sequence, (camera, frame, captured_at, detections))
+
+    def _free_slot(self, slot):
+        with self.slot_condition:
+            self.free_slots.append(slot)
+            self.slot_condition.notify()
+
+    def _deliver(self, camera, sequence, item):
+        """Hand results to on_result in capture order; item[3] is None for a dropped frame"""
+        # Hold results that overtook an earlier frame of the same camera
+        waiting = self.reorder.setdefault(camera.camera_id, {})
+        expected = self.expected.get(camera.camera_id, 0)
+        if sequence < expected:
+            return  # its turn was already skipped
+        waiting[sequence] = item
+        if len(waiting) > self.slot_count:
+            # More results held than frames can be in flight: the missing ones are lost for good
+            skipped = min(waiting)
+            for task_id, entry in list(self.pending.items()):
+                if entry[0] is camera and entry[3] < skipped:
+                    del self.pending[task_id]
+                    self._free_slot(entry[5])
+            logger.warning(f"⚠️ Gave up waiting for {skipped - expected} inference result(s) of {camera.location}")
+            expected = skipped
+        while expected in waiting:
+            item = waiting.pop(expected)
+            expected += 1
+            if item[3] is None:
+                continue
+            try:
+                self.on_result(*item)
+            except Exception as e:
+                logger.error(f"❌ Error handling inference result of {camera.location}: {e}")
+        self.expected[camera.camera_id] = expected
+
+    def _fail(self, task_id):
+        """Drop a task that will never return: free its slot and let later frames through"""
+        entry = self.pending.pop(task_id, None)
+        if entry is None:
+            return
+        camera, frame, captured_at, sequence, _, slot = entry
+        self._free_slot(slot)
+        self._deliver(camera, sequence, (camera, frame, captured_at, None))
+
+    def _check_workers(self):
+        """Drop the frames of workers that died (OOM, crash); at most every half second"""
+        now = time.monotonic()
+        if now < self.next_health_check or self.closing:
+            return
+        self.next_health_check = now + 0.5
+        for process in [p for p in self.alive if not p.is_alive()]:
+            self.alive.remove(process)
+            lost = self.in_flight.pop(process.pid, set())
+            logger.error(f"❌ {process.name} died (exit code {process.exitcode}), "
+                         f"dropping {len(lost)} frame(s); {len(self.alive)} worker(s) left")
+            for task_id in lost:
+                self._fail(task_id)
+        if not self.alive and self.pending:
+            # Nobody is left to take the queued frames
+            for task_id in list(self.pending):
+                self._fail(task_id)
+
+    def _detections(self, data, crops, frame_shape):
+        """Frame detections from a worker's (N, 7) result array"""
+        if self.merge is None:
+            return DetectionBatch.from_array(data[:, :6], self.names)
+        parts = [DetectionBatch.from_array(data[data[:, 6] == index, :6], self.names)
+                 for index in range(len(crops))]
+        return self.merge(parts, crops, frame_shape)
+
+    def _abort(self):
+        """Kill the workers after a failed start and free the shared memory"""
+        for process in self.processes:
+            if process.is_alive():
+                process.terminate()
+            process.join(timeout=5)
+        self.shm.close()
+        self.shm.unlink()
+
+    def close(self):
+        """Stop the workers and free the shared memory"""
+        self.closing = True
+        for _ in self.processes:
+            self.tasks.put(None)
+        for process in self.processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self.stop_event.set()
+        if self.collector:
+            self.collector.join(timeout=5)
+        self.shm.close()
+        self.shm.unlink()
@@ -0,0 +1,152 @@
+import cv2
+import time
+import threading
+import logging
+from metrics import STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+BOUNDARY = 'frame'
+
+class LiveFeed:
+    def __init__(self):
+        """Latest encoded frame of one camera, shared by every viewer"""
+        self.jpeg = None
+        self.sequence = 0
+        self.condition = threading.Condition()
+
+    def publish(self, jpeg):
+        with self.condition:
+            self.jpeg = jpeg
+            self.sequence += 1
+            self.condition.notify_all()
+
+    def wait(self, after, timeout=1.0):
+        """Newest frame with a sequence number above after, or (after, None) on timeout"""
+        with self.condition:
+            self.condition.wait_for(lambda: self.sequence > after, timeout=timeout)
+            if self.sequence > after:
+                return self.sequence, self.jpeg
+            return after, None
+
+class LiveStream:
+    def __init__(self, cameras, image_processor, fps=10, quality=70, width=0):
+        """Encode each camera's annotated frame once per tick and fan it out to MJPEG viewers"""
+        self.cameras = cameras
+        self.image_processor = image_processor
+        self.interval = 1.0 / fps
+        self.quality = quality
+        self.width = width
+        self.feeds = {camera.camera_id: LiveFeed() for camera in cameras}
+        self.viewers = 0
+        self.viewers_lock = threading.Lock()
+        self.last_snapshot = 0
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    @property
+    def watched(self):
+        """True while a viewer is connected or a snapshot was requested recently"""
+        return self.viewers > 0 or time.time() - self.last_snapshot < 5
+
+    def register_routes(self, server):
+        """Serve /stream?camera=<id> (MJPEG) and /snapshot?camera=<id> (JPEG)"""
+        server.add_route('/stream', self.stream_route)
+        server.add_route('/snapshot', self.snapshot_route)
+
+    def start(self):
+        """Start the encoder thread"""
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, name='live-stream', daemon=True)
+        self.thread.start()
+        logger.info(f"📺 Live stream at {1.0 / self.interval:g} fps for {', '.join(self.feeds)}")
+
+    def stop(self):
+        """Stop encoding and end open streams"""
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=2)
+
+    def _run(self):
+        """Encoder loop: at most one encode per camera per tick, whatever the viewer count"""
+        next_tick = time.perf_counter()
+        while not self.stop_event.is_set():
+            # Nothing is encoded while nobody is watching
+            watched = self.watched
+            for camera in self.cameras:
+                item = camera.stream_slot.take(timeout=0)
+                if item is None or not watched:
+                    continue
+                with STAGE_SECONDS.labels(camera.camera_id, 'stream_encode').time():
+                    jpeg = self._encode(*item)
+                if jpeg is not None:
+                    self.feeds[camera.camera_id].publish(jpeg)
+
+            next_tick += self.interval
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                self.stop_event.wait(delay)
+            else:
+                next_tick = time.perf_counter()
+
+    def _encode(self, frame, detections):
+        """Annotate a copy of the frame with the latest detections and encode it"""
+        image = frame.copy()
+        if detections is not None:
+            self.image_processor.draw_detections(image, detections)
+        if self.width and image.shape[1] > self.width:
+            height = image.shape[0] * self.width // image.shape[1]
+            image = cv2.resize(image, (self.width, height), interpolation=cv2.INTER_AREA)
+        ok, encoded = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        return encoded.tobytes() if ok else None
+
+    def _feed_for(self, request):
+        camera_id = request.query.get('camera') or next(iter(self.feeds))
+        feed = self.feeds.get(camera_id)
+        if feed is None:
+            request.send_error(404, f"Unknown camera {camera_id}")
+        return feed
+
+    def snapshot_route(self, request):
+        """Serve the latest encoded frame"""
+        feed = self._feed_for(request)
+        if feed is None:
+            return
+        self.last_snapshot = time.time()
+        _, jpeg = feed.wait(feed.sequence, timeout=2.0)
+        if jpeg is None:
+            request.send_error(503, 'No frame available yet')
+            return
+        request.send_response(200)
+        request.send_header('Content-Type', 'image/jpeg')
+        request.send_header('Content-Length', str(len(jpeg)))
+        request.send_header('Cache-Control', 'no-cache')
+        request.end_headers()
+        request.wfile.write(jpeg)
+
+    def stream_route(self, request):
+        """Serve a multipart MJPEG stream; a slow viewer skips to the newest frame"""
+        feed = self._feed_for(request)
+        if feed is None:
+            return
+        request.send_response(200)
+        request.send_header('Content-Type', f'multipart/x-mixed-replace; boundary={BOUNDARY}')
+        request.send_header('Cache-Control', 'no-cache')
+        request.end_headers()
+
+        with self.viewers_lock:
+            self.viewers += 1
+        try:
+            sequence = 0
+            while not self.stop_event.is_set():
+                sequence, jpeg = feed.wait(sequence)
+                if jpeg is None:
+                    continue
+                request.wfile.write(
+                    f'--{BOUNDARY}\r\nContent-Type: image/jpeg\r\nContent-Length: {len(jpeg)}\r\n\r\n'.encode('ascii')
+                )
+                request.wfile.write(jpeg)
+                request.wfile.write(b'\r\n')
+        finally:
+            with self.viewers_lock:
+                self.viewers -= 1
@@ -0,0 +1,60 @@
+import threading
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+logger = logging.getLogger(__name__)
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    server_version = 'SurveillanceSystem/1.0'
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        route = self.server.routes.get(parsed.path)
+        if route is None:
+            self.send_error(404)
+            return
+        self.query = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+        try:
+            route(self)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        except Exception as e:
+            logger.error(f"❌ Error serving {parsed.path}: {e}")
+
+    def log_message(self, format, *args):
+        logger.debug(f"🌐 {self.address_string()} {format % args}")
+
+class LocalServer:
+    def __init__(self, host='127.0.0.1', port=9100):
+        """Small threaded HTTP server for local endpoints such as /metrics"""
+        self.host = host
+        self.port = port
+        self.routes = {}
+        self.httpd = None
+        self.thread = None
+
+    def add_route(self, path, handler):
+        """Serve GET requests for path with handler(request)"""
+        self.routes[path] = handler
+
+    def start(self):
+        """Start serving in a background thread"""
+        try:
+            self.httpd = ThreadingHTTPServer((self.host, self.port), _RequestHandler)
+        except OSError as e:
+            logger.error(f"❌ Cannot start local server on {self.host}:{self.port}: {e}")
+            return False
+        self.httpd.daemon_threads = True
+        self.httpd.routes = self.routes
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name='local-server', daemon=True)
+        self.thread.start()
+        logger.info(f"🌐 Local server on http://{self.host}:{self.port} ({', '.join(sorted(self.routes))})")
+        return True
+
+    def stop(self):
+        """Stop serving"""
+        if self.httpd:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
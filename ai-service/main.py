@@ -2,12 +2,47 @@ import cv2
 import time
 import json
 import os
+import threading
+import numpy as np
+from functools import partial
 from datetime import datetime
-from ultralytics import YOLO
 from dotenv import load_dotenv
 from image_processor import ImageProcessor
 from api_client import APIClient
-from event_detector import EventDetector
+from event_delivery import EventDelivery
+from clip_recorder import ClipWriter
+from event_coalescer import EventCoalescer
+from quality_controller import QualityController, build_ladder
+from similarity_index import SimilarityIndex, describe
+from tiling import TilePlanner
+from startup import StartupProfile
+from state_store import StateStore
+from occupancy import OccupancyRecorder
+from camera import open_cameras, parse_camera_sources
+from models import DetectionBatch
+from zones import load_zones
+from pipeline import DropOldestQueue
+from local_server import LocalServer
+from live_stream import LiveStream
+from inference_workers import InferencePool
+from metrics import (REGISTRY, STAGE_SECONDS, FRAMES_READ, FRAMES_DECODED, FRAMES_PROCESSED,
+                     EVENTS_EMITTED, metrics_route)
+from config import (CAMERA_SOURCES, CAMERA_LOCATIONS, INFERENCE_BATCH_SIZE, EVENT_QUEUE_SIZE, STAGE_JOIN_TIMEOUT_SECONDS,
+                    EVENT_SPOOL_PATH, DELIVERY_QUEUE_SIZE, DELIVERY_BATCH_SIZE,
+                    DELIVERY_RETRY_BASE_SECONDS, DELIVERY_RETRY_MAX_SECONDS,
+                    LOCAL_SERVER_ENABLED, LOCAL_SERVER_HOST, LOCAL_SERVER_PORT, ROI_ZONES,
+                    CLIP_ENABLED, CLIP_SAVE_PATH, CLIP_PRE_SECONDS, CLIP_POST_SECONDS, CLIP_FPS, CLIP_CODEC,
+                    HEADLESS, LIVE_STREAM_ENABLED, LIVE_STREAM_FPS, LIVE_STREAM_QUALITY, LIVE_STREAM_WIDTH,
+                    MODEL_PATH, MODEL_NAME, INFERENCE_BACKEND, INFERENCE_IMGSZ, INFERENCE_INT8,
+                    INT8_CALIBRATION_DATA, MODEL_WARMUP, INFERENCE_WORKERS, INFERENCE_SLOTS,
+                    INFERENCE_SLOT_MB, EVENT_COALESCE_WINDOW_SECONDS, EVENT_COALESCE_MAX_SECONDS,
+                    QUALITY_CONTROL_ENABLED, LATENCY_TARGET_MS, QUALITY_INTERVAL_SECONDS, QUALITY_MAX_IMGSZ,
+                    QUALITY_MIN_IMGSZ, QUALITY_MAX_STRIDE, QUALITY_MIN_JPEG, IMAGE_QUALITY,
+                    MOTION_MIN_STRIDE, PROCESS_EVERY_N_FRAMES, SIMILARITY_ENABLED, SIMILARITY_INDEX_PATH,
+                    TILED_INFERENCE, TILE_SIZE, TILE_OVERLAP, TILE_MIN_FRAME_SIZE, TILE_FULL_FRAME,
+                    TILE_MATCH_THRESHOLD, TILE_NMS_IOU, STATE_SNAPSHOT_PATH, STATE_SNAPSHOT_SECONDS, STATE_MAX_AGE_SECONDS,
+                    OCCUPANCY_ENABLED, OCCUPANCY_PATH, OCCUPANCY_GRID_WIDTH, OCCUPANCY_BUCKET_SECONDS,
+                    OCCUPANCY_FLUSH_SECONDS, OCCUPANCY_SEND_TO_BACKEND)
 import logging
 
 # Load environment variables
@@ -18,56 +53,248 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class SurveillanceSystem:
-    def __init__(self):
-        """Initialize the surveillance system"""
+    def __init__(self, camera_sources=None, model=None, api_client=None, cameras=None, display=True,
+                 model_factory=None):
+        """Initialize the surveillance system for one or more cameras
+        
+        model, api_client and cameras can be injected (e.g. by the benchmark
+        harness) instead of loading YOLO, the backend client and live cameras.
+        With INFERENCE_WORKERS > 0, model_factory (a picklable callable)
+        builds the model inside each worker process instead.
+        """
         logger.info("🤖 Initializing Surveillance System...")
+        self.startup = StartupProfile()
         
         # Load configuration
         self.camera_index = int(os.getenv('CAMERA_INDEX', 0))
+        if camera_sources is None:
+            camera_sources = parse_camera_sources(CAMERA_SOURCES) or [self.camera_index]
         self.confidence_threshold = float(os.getenv('CONFIDENCE_THRESHOLD', 0.5))
         self.nodejs_api_url = os.getenv('NODEJS_API_URL', 'http://localhost:5000')
         
-        # Initialize components
-        self.model = YOLO('yolov8n.pt')  # Will download automatically first time
+        # Large frames can be sliced into overlapping tiles so distant people stay detectable
+        self.tiler = None
+        if TILED_INFERENCE:
+            self.tiler = TilePlanner(
+                tile_size=TILE_SIZE,
+                overlap=TILE_OVERLAP,
+                min_frame_size=TILE_MIN_FRAME_SIZE,
+                full_frame=TILE_FULL_FRAME,
+                match_threshold=TILE_MATCH_THRESHOLD,
+                iou_threshold=TILE_NMS_IOU
+            )
+        
+        # Initialize components (one model is shared by every camera)
+        self.api_client = api_client or APIClient(self.nodejs_api_url)
+        self.inference_pool = None
+        startup_phases = {}
+        if INFERENCE_WORKERS > 0 and model is None:
+            if model_factory is None:
+                from detectors import Detector
+                model_factory = partial(Detector, MODEL_NAME, INFERENCE_BACKEND, imgsz=INFERENCE_IMGSZ,
+                                        int8=INFERENCE_INT8, model_path=MODEL_PATH,
+                                        calibration_data=INT8_CALIBRATION_DATA)
+            # Worker processes load the model; this process only routes frames
+            self.inference_pool = InferencePool(
+                INFERENCE_WORKERS, model_factory, self.finish_frame,
+                batch_size=INFERENCE_BATCH_SIZE,
+                conf=self.confidence_threshold,
+                slots=INFERENCE_SLOTS,
+                slot_mb=INFERENCE_SLOT_MB,
+                warmup=MODEL_WARMUP,
+                merge=self.tiler.merge if self.tiler else None
+            )
+            startup_phases['model'] = self.inference_pool.start
+        elif model is None:
+            startup_phases['model'] = partial(self.load_model, min(INFERENCE_BATCH_SIZE, len(camera_sources)))
+        
+        # Model load, camera opening and the state snapshot read are independent: do them at once
+        if cameras is None:
+            locations = [l.strip() for l in CAMERA_LOCATIONS.split(',') if l.strip()]
+            startup_phases['cameras'] = partial(open_cameras, camera_sources, locations)
+        self.state_store = None
+        if STATE_SNAPSHOT_SECONDS > 0:
+            self.state_store = StateStore(STATE_SNAPSHOT_PATH, STATE_SNAPSHOT_SECONDS, STATE_MAX_AGE_SECONDS)
+            startup_phases['state'] = self.state_store.load
+        # The backend check only informs; events are spooled while the backend is away
+        threading.Thread(target=self.startup.phase, args=('backend', self.api_client.test_connection),
+                         name='backend-check', daemon=True).start()
+        loaded = self.startup.concurrently(startup_phases)
+        self.model = loaded.get('model', model)
+        self.cameras = loaded.get('cameras', cameras)
+        
         self.image_processor = ImageProcessor()
-        self.api_client = APIClient(self.nodejs_api_url)
-        self.event_detector = EventDetector()
+        self.event_delivery = EventDelivery(
+            self.api_client, EVENT_SPOOL_PATH,
+            queue_size=DELIVERY_QUEUE_SIZE,
+            batch_size=DELIVERY_BATCH_SIZE,
+            retry_base_seconds=DELIVERY_RETRY_BASE_SECONDS,
+            retry_max_seconds=DELIVERY_RETRY_MAX_SECONDS
+        )
+        self.occupancy = None
+        if OCCUPANCY_ENABLED:
+            self.occupancy = OccupancyRecorder(
+                OCCUPANCY_PATH,
+                grid_width=OCCUPANCY_GRID_WIDTH,
+                bucket_seconds=OCCUPANCY_BUCKET_SECONDS,
+                flush_seconds=OCCUPANCY_FLUSH_SECONDS,
+                api_client=self.api_client if OCCUPANCY_SEND_TO_BACKEND else None
+            )
+        self.clip_writer = None
+        if CLIP_ENABLED:
+            self.clip_writer = ClipWriter(
+                CLIP_SAVE_PATH,
+                pre_seconds=CLIP_PRE_SECONDS,
+                post_seconds=CLIP_POST_SECONDS,
+                fps=CLIP_FPS,
+                codec=CLIP_CODEC
+            )
         
-        # Initialize camera
-        self.cap = cv2.VideoCapture(self.camera_index)
-        if not self.cap.isOpened():
-            logger.error(f"❌ Cannot open camera {self.camera_index}")
-            raise Exception(f"Camera {self.camera_index} not available")
+        # Pipeline stages are connected by bounded, never-blocking buffers
+        self.batch_size = INFERENCE_BATCH_SIZE
+        self.frames_ready = threading.Event()
+        self.inference_done = threading.Event()
+        self.event_queue = DropOldestQueue(EVENT_QUEUE_SIZE, name='Event queue')
+        self.coalescer = EventCoalescer(EVENT_COALESCE_WINDOW_SECONDS, EVENT_COALESCE_MAX_SECONDS)
+        self.stop_event = threading.Event()
+        self.threads = []
+        self.display = display and not HEADLESS
         
-        # Set camera properties
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-        self.cap.set(cv2.CAP_PROP_FPS, 30)
+        # Pick up tracks and cooldowns where the previous run left off
+        saved_state = loaded.get('state') or {}
+        restored = [c for c in self.cameras if c.camera_id in saved_state]
+        for camera in restored:
+            camera.event_detector.restore(saved_state[camera.camera_id])
+        if restored:
+            logger.info(f"💾 Restored tracker and cooldown state of {len(restored)} camera(s)")
         
+        # Region-of-interest zones limit inference and events per camera
+        zone_sets = load_zones(ROI_ZONES)
+        for camera in self.cameras:
+            camera.zones = zone_sets.get(camera.camera_id, camera.zones)
+        
+        # Trade accuracy for latency when the box is overloaded, and back
+        self.quality_controller = None
+        if QUALITY_CONTROL_ENABLED:
+            ladder = build_ladder(
+                max(QUALITY_MAX_IMGSZ, INFERENCE_IMGSZ), min(QUALITY_MIN_IMGSZ, INFERENCE_IMGSZ),
+                MOTION_MIN_STRIDE, max(QUALITY_MAX_STRIDE, MOTION_MIN_STRIDE),
+                IMAGE_QUALITY, min(QUALITY_MIN_JPEG, IMAGE_QUALITY)
+            )
+            start_level = next((i for i, level in enumerate(ladder) if level[0] <= INFERENCE_IMGSZ), 0)
+            self.quality_controller = QualityController(
+                ladder, self.apply_quality,
+                target_ms=LATENCY_TARGET_MS,
+                start_level=start_level,
+                interval_seconds=QUALITY_INTERVAL_SECONDS
+            )
+        
+        # Local HTTP endpoints (/metrics, /similar, and /stream + /snapshot for the live view)
+        self.local_server = LocalServer(LOCAL_SERVER_HOST, LOCAL_SERVER_PORT)
+        self.local_server.add_route('/metrics', metrics_route)
+        self.similarity_index = None
+        if SIMILARITY_ENABLED:
+            self.similarity_index = SimilarityIndex(SIMILARITY_INDEX_PATH)
+            self.local_server.add_route('/similar', self.similarity_index.similar_route)
+        self.live_stream = None
+        if LIVE_STREAM_ENABLED:
+            self.live_stream = LiveStream(
+                self.cameras, self.image_processor,
+                fps=LIVE_STREAM_FPS,
+                quality=LIVE_STREAM_QUALITY,
+                width=LIVE_STREAM_WIDTH
+            )
+            self.live_stream.register_routes(self.local_server)
+        self.register_metrics()
+        
+        self.startup.finish()
         logger.info("✅ Surveillance System initialized successfully")
     
+    def load_model(self, warmup_batch_size):
+        """Load the in-process detector (imports ultralytics/torch on first use) and warm it up"""
+        from detectors import Detector
+        model = Detector(MODEL_NAME, INFERENCE_BACKEND, imgsz=INFERENCE_IMGSZ, int8=INFERENCE_INT8,
+                         model_path=MODEL_PATH, calibration_data=INT8_CALIBRATION_DATA)
+        if MODEL_WARMUP:
+            model.warmup(batch_size=warmup_batch_size)
+        return model
+    
+    def register_metrics(self):
+        """Expose counters kept by the pipeline components, read at scrape time"""
+        REGISTRY.callback(
+            'surveillance_frames_dropped_total', 'Frames replaced before inference picked them up',
+            ('camera',), lambda: [((c.camera_id,), c.inference_slot.dropped) for c in self.cameras],
+            kind='counter')
+        REGISTRY.callback(
+            'surveillance_motion_gate_skip_ratio', 'Fraction of frames the motion gate kept from the model',
+            ('camera',), lambda: [((c.camera_id,), c.motion_gate.skip_ratio) for c in self.cameras])
+        REGISTRY.callback(
+            'surveillance_event_queue_depth', 'Events waiting for the event stage',
+            (), lambda: [((), len(self.event_queue))])
+        REGISTRY.callback(
+            'surveillance_events_dropped_total', 'Events dropped because the event queue was full',
+            (), lambda: [((), self.event_queue.dropped)], kind='counter')
+        REGISTRY.callback(
+            'surveillance_delivery_queue_depth', 'Events waiting for delivery to the backend',
+            ('queue',), lambda: [(('memory',), self.event_delivery.queue.qsize()),
+                                 (('spool',), len(self.event_delivery.spool))])
+        if self.quality_controller:
+            REGISTRY.callback(
+                'surveillance_quality_level', 'Current adaptive quality level (0 = best)',
+                (), lambda: [((), self.quality_controller.level)])
+            REGISTRY.callback(
+                'surveillance_inference_imgsz', 'Current detector input size',
+                (), lambda: [((), self.quality_controller.settings[0])])
+        if self.live_stream:
+            REGISTRY.callback(
+                'surveillance_live_stream_viewers', 'Open MJPEG live stream connections',
+                (), lambda: [((), self.live_stream.viewers)])
+    
     def start_monitoring(self):
-        """Start the main monitoring loop"""
+        """Start the capture, inference and event stages and run the display loop"""
         logger.info("🎥 Starting surveillance monitoring...")
         
-        frame_count = 0
-        process_every_n_frames = 5  # Process every 5th frame for performance
+        self.stop_event.clear()
+        self.inference_done.clear()
+        self.threads = [
+            threading.Thread(target=self._capture_loop, args=(camera,),
+                             name=f'capture-{camera.camera_id}', daemon=True)
+            for camera in self.cameras
+        ]
+        self.threads.append(threading.Thread(target=self._inference_loop, name='inference', daemon=True))
+        self.threads.append(threading.Thread(target=self._event_loop, name='events', daemon=True))
+        for thread in self.threads:
+            thread.start()
+        self.event_delivery.start()
+        if self.state_store:
+            self.state_store.start()
+        if self.occupancy:
+            self.occupancy.start()
+        if self.clip_writer:
+            self.clip_writer.start()
+        if LOCAL_SERVER_ENABLED:
+            self.local_server.start()
+            if self.live_stream:
+                self.live_stream.start()
+        elif self.live_stream:
+            logger.warning("⚠️ Live stream needs LOCAL_SERVER_ENABLED=true")
         
         try:
-            while True:
-                ret, frame = self.cap.read()
-                if not ret:
-                    logger.error("❌ Failed to read frame from camera")
-                    break
-                
-                frame_count += 1
+            while not self.stop_event.is_set():
+                shown = False
+                if not self.display:
+                    self.stop_event.wait(0.1)
+                    continue
                 
-                # Process every nth frame to improve performance
-                if frame_count % process_every_n_frames == 0:
-                    self.process_frame(frame)
+                for camera in self.cameras:
+                    frame = camera.display_slot.take(timeout=0)
+                    if frame is not None:
+                        # Local preview window (HEADLESS=true disables it)
+                        self.display_frame(camera, frame)
+                        shown = True
                 
-                # Display frame (optional - remove in production)
-                self.display_frame(frame)
+                if not shown:
+                    self.stop_event.wait(0.01)
                 
                 # Check for exit
                 if cv2.waitKey(1) & 0xFF == ord('q'):
@@ -79,90 +306,284 @@ class SurveillanceSystem:
         except Exception as e:
             logger.error(f"❌ Error in monitoring loop: {e}")
         finally:
+            self.stop()
             self.cleanup()
     
-    def process_frame(self, frame):
+    def stop(self):
+        """Signal all pipeline stages to stop and wait for them"""
+        self.stop_event.set()
+        for camera in self.cameras:
+            camera.interrupt()
+        for thread in self.threads:
+            thread.join(timeout=STAGE_JOIN_TIMEOUT_SECONDS)
+            if thread.is_alive():
+                logger.warning(f"⚠️ Stage '{thread.name}' did not stop in time")
+        self.threads = []
+    
+    def _capture_loop(self, camera):
+        """Capture stage: grab frames as fast as the camera delivers them, decode only those used"""
+        read_timer = STAGE_SECONDS.labels(camera.camera_id, 'frame_read')
+        decode_timer = STAGE_SECONDS.labels(camera.camera_id, 'frame_decode')
+        frames_read = FRAMES_READ.labels(camera.camera_id)
+        frames_decoded = FRAMES_DECODED.labels(camera.camera_id)
+        clip_timer = STAGE_SECONDS.labels(camera.camera_id, 'clip_buffer')
+        
+        try:
+            while not self.stop_event.is_set():
+                with read_timer.time():
+                    ret = camera.grab()
+                if not ret:
+                    logger.error(f"❌ Failed to read frame from {camera.location}")
+                    break
+                captured_at = camera.timestamp
+                
+                camera.frame_count += 1
+                frames_read.inc()
+                if not self._frame_needed(camera, captured_at):
+                    camera.motion_gate.skip()
+                    continue
+                
+                with decode_timer.time():
+                    ret, frame = camera.retrieve()
+                if not ret:
+                    camera.motion_gate.skip()
+                    continue
+                frames_decoded.inc()
+                
+                if self.display:
+                    camera.display_slot.put(frame)
+                if self.live_stream:
+                    camera.stream_slot.put((frame, camera.last_detections))
+                if camera.clip_buffer is not None:
+                    with clip_timer.time():
+                        camera.clip_buffer.add(frame, captured_at)
+                
+                # Only frames the motion gate lets through are offered to
+                # inference; a frame not picked up yet is simply replaced
+                if camera.motion_gate.should_process(frame):
+                    camera.inference_slot.put((frame, captured_at))
+                    self.frames_ready.set()
+        except Exception as e:
+            logger.error(f"❌ Error in capture stage for {camera.location}: {e}")
+        finally:
+            camera.active = False
+            if not any(c.active for c in self.cameras):
+                self.stop_event.set()
+    
+    def _frame_needed(self, camera, captured_at):
+        """True if any consumer will use the grabbed frame, so it is worth decoding"""
+        return (self.display
+                or (self.live_stream is not None and self.live_stream.watched)
+                or (camera.clip_buffer is not None and camera.clip_buffer.due(captured_at))
+                or camera.motion_gate.wants_frame())
+    
+    def _inference_loop(self):
+        """Inference stage: batch the due frames of all cameras into one pass"""
+        while not self.stop_event.is_set():
+            if not self.frames_ready.wait(timeout=0.5):
+                continue
+            self.frames_ready.clear()
+            
+            batch = []
+            for camera in self.cameras:
+                item = camera.inference_slot.take(timeout=0)
+                if item is not None:
+                    batch.append((camera, *item))
+            
+            if not batch:
+                continue
+            if self.inference_pool is None:
+                self.process_frames(batch)
+                continue
+            
+            # Worker processes run the model; results come back through finish_frame
+            for camera, frame, captured_at in batch:
+                if not self.inference_pool.submit(camera, frame, captured_at, self.plan_inputs(camera, frame)):
+                    logger.debug(f"⏭️ No free inference slot, skipped a frame of {camera.location}")
+        
+        # Let the workers finish the frames already submitted
+        if self.inference_pool:
+            self.inference_pool.close()
+        self.inference_done.set()
+    
+    def _event_loop(self):
+        """Event stage: send the first event of a burst, coalesce the rest; save and deliver off the hot path"""
+        while True:
+            stopping = self.stop_event.is_set() and self.inference_done.is_set() and not len(self.event_queue)
+            item = None if stopping else self.event_queue.get(timeout=0.5)
+            if item is not None:
+                camera, event, frame, detections = item
+                if self.coalescer.add(camera, event, frame, detections):
+                    # Clips are cut around the event that opens a burst, while its frames are buffered
+                    self.request_clip(camera, event)
+                    self.handle_event(camera, event, frame, detections)
+            
+            for ready in self.coalescer.due(time.time(), flush=stopping):
+                self.handle_event(*ready)
+            if stopping:
+                break
+    
+    def request_clip(self, camera, event):
+        """Schedule the pre/post-event clip of an event and record its path on the event"""
+        if self.clip_writer and camera.clip_buffer is not None:
+            event['clipPath'] = self.clip_writer.request(
+                camera.clip_buffer, event['timestamp'], camera.camera_id, event['type']
+            )
+    
+    def plan_inputs(self, camera, frame):
+        """Frame rectangles (x1, y1, x2, y2) to run the model on: the whole frame, ROI crops and/or tiles"""
+        if camera.zones is not None:
+            rects = camera.zones.crops(frame.shape)
+        else:
+            rects = [(0, 0, frame.shape[1], frame.shape[0])]
+        if self.tiler is not None:
+            rects = self.tiler.plan(rects, frame.shape)
+        return rects
+    
+    def merge_inputs(self, camera, parts, rects, frame_shape):
+        """Join the detections of a frame's inputs; objects seen by several overlapping tiles become one"""
+        if self.tiler is None:
+            return DetectionBatch.concatenate(parts, parts[0].names)
+        with STAGE_SECONDS.labels(camera.camera_id, 'merge_tiles').time():
+            return self.tiler.merge(parts, rects, frame_shape)
+    
+    def process_frame(self, camera, frame):
         """Process a single frame for object detection and events"""
+        self.process_frames([(camera, frame, time.time())])
+    
+    def process_frames(self, batch):
+        """Run batched YOLO passes over (camera, frame, captured_at) items and route the results"""
         try:
-            # Run YOLO detection
-            results = self.model(frame, conf=self.confidence_threshold)
+            # Cameras with ROI zones only send the crops covering their zones; large frames may be tiled
+            inputs, owners = [], []
+            rects = [self.plan_inputs(camera, frame) for camera, frame, _ in batch]
+            for index, frame_rects in enumerate(rects):
+                frame = batch[index][1]
+                for x1, y1, x2, y2 in frame_rects:
+                    inputs.append(frame[y1:y2, x1:x2])
+                    owners.append((index, x1, y1))
             
-            # Extract detection data
-            detections = self.extract_detections(results)
+            # Run YOLO detection on all frames, crops and tiles, batch_size at a time
+            results = []
+            for start in range(0, len(inputs), self.batch_size):
+                with STAGE_SECONDS.labels('all', 'inference').time():
+                    results.extend(self.model(inputs[start:start + self.batch_size],
+                                              conf=self.confidence_threshold, verbose=False))
             
-            # Detect events based on current detections
-            events = self.event_detector.detect_events(detections, frame.shape)
+            # Extract detection data, mapping crop coordinates back to the frame
+            parts = [[] for _ in batch]
+            for (index, x1, y1), result in zip(owners, results):
+                camera = batch[index][0]
+                with STAGE_SECONDS.labels(camera.camera_id, 'extract_detections').time():
+                    parts[index].append(self.extract_detections(result).offset(x1, y1))
             
-            # Process each detected event
-            for event in events:
-                self.handle_event(event, frame, detections)
+            for (camera, frame, captured_at), frame_parts, frame_rects in zip(batch, parts, rects):
+                self.finish_frame(camera, frame, captured_at,
+                                  self.merge_inputs(camera, frame_parts, frame_rects, frame.shape))
                 
         except Exception as e:
-            logger.error(f"❌ Error processing frame: {e}")
-    
-    def extract_detections(self, results):
-        """Extract detection data from YOLO results"""
-        detections = []
-        
-        for result in results:
-            boxes = result.boxes
-            if boxes is not None:
-                for box in boxes:
-                    # Get bounding box coordinates
-                    x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                    
-                    # Get confidence and class
-                    confidence = float(box.conf[0].cpu().numpy())
-                    class_id = int(box.cls[0].cpu().numpy())
-                    class_name = self.model.names[class_id]
-                    
-                    detection = {
-                        'class_name': class_name,
-                        'confidence': confidence,
-                        'bbox': {
-                            'x1': float(x1), 'y1': float(y1),
-                            'x2': float(x2), 'y2': float(y2),
-                            'width': float(x2 - x1),
-                            'height': float(y2 - y1)
-                        }
-                    }
-                    detections.append(detection)
-        
-        return detections
-    
-    def handle_event(self, event, frame, detections):
+            logger.error(f"❌ Error processing frames: {e}")
+    
+    def finish_frame(self, camera, frame, captured_at, detections):
+        """Run zone filtering and event detection on one frame's detections (in capture order)"""
+        if camera.zones is not None:
+            # Discard anything outside the zones before event detection
+            detections = camera.zones.assign(detections, frame.shape)
+        
+        # Detect events based on this camera's detection history
+        with STAGE_SECONDS.labels(camera.camera_id, 'detect_events').time():
+            events = camera.event_detector.detect_events(detections, frame.shape)
+        
+        camera.last_detections = detections
+        if self.occupancy:
+            # Confirmed tracks, not raw detections, so one-frame flickers are not counted
+            people = camera.event_detector.tracker.confirmed_tracks('person')
+            boxes = np.array([t.box for t in people], dtype=np.float32).reshape(-1, 4)
+            self.occupancy.observe(camera, frame.shape, boxes, captured_at)
+        FRAMES_PROCESSED.labels(camera.camera_id).inc()
+        latency = time.time() - captured_at
+        STAGE_SECONDS.labels(camera.camera_id, 'frame_latency').observe(latency)
+        if self.quality_controller:
+            self.quality_controller.observe(latency)
+        
+        # Hand each detected event to the event stage
+        for event in events:
+            EVENTS_EMITTED.labels(camera.camera_id, event['type']).inc()
+            self.event_queue.put((camera, event, frame, detections))
+        
+        if self.state_store and self.state_store.due(time.time()):
+            self.state_store.save(self.snapshot_state())
+    
+    def snapshot_state(self):
+        """Tracker and cooldown state of every camera (taken on the thread that updates it)"""
+        return {camera.camera_id: camera.event_detector.snapshot() for camera in self.cameras}
+    
+    def apply_quality(self, imgsz, stride, jpeg_quality):
+        """Apply a quality level: detector input size, frame stride floor and JPEG quality"""
+        if self.inference_pool:
+            self.inference_pool.imgsz = imgsz
+        elif hasattr(self.model, 'set_imgsz'):
+            self.model.set_imgsz(imgsz)
+        for camera in self.cameras:
+            camera.motion_gate.min_stride = max(MOTION_MIN_STRIDE, stride)
+            camera.motion_gate.fixed_stride = max(PROCESS_EVERY_N_FRAMES, stride)
+        self.image_processor.quality = jpeg_quality
+    
+    def extract_detections(self, result):
+        """Extract detection data from one YOLO result as a columnar batch"""
+        return DetectionBatch.from_result(result, self.model.names)
+    
+    def handle_event(self, camera, event, frame, detections):
         """Handle a detected event"""
         try:
-            logger.info(f"🚨 Event detected: {event['type']}")
+            logger.info(f"🚨 Event detected on {camera.location}: {event['type']}")
             
-            # Process and save image
-            image_path = self.image_processor.save_event_image(
-                frame, detections, event
+            # Encode the image once; it is written to disk in the background
+            image_path, image_bytes = self.image_processor.save_event_image(
+                frame, detections, event, camera_id=camera.camera_id
             )
             
             # Prepare event data for API
             event_data = {
-                'timestamp': datetime.now().isoformat(),
-                'location': f"Camera-{self.camera_index}",
+                # Detection time: coalesced events are handled seconds after they happened
+                'timestamp': datetime.fromtimestamp(event['timestamp']).isoformat(),
+                'location': camera.location,
                 'eventType': event['type'],
                 'description': event['description'],
                 'confidence': event['confidence'],
                 'boundingBoxes': self.format_bounding_boxes(detections),
                 'metadata': {
-                    'objectsDetected': [d['class_name'] for d in detections],
-                    'personCount': len([d for d in detections if d['class_name'] == 'person']),
+                    'objectsDetected': detections.class_names,
+                    'personCount': detections.count('person'),
                     'activityDuration': event.get('duration', 0),
-                    'cameraId': f'cam-{self.camera_index:03d}'
+                    'cameraId': camera.camera_id
                 }
             }
             
-            # Send to Node.js API
-            success = self.api_client.send_event(event_data, image_path)
+            if event.get('zone'):
+                event_data['metadata']['zone'] = event['zone']
+            
+            if image_path:
+                event_data['imagePath'] = image_path
+            
+            if event.get('summary'):
+                event_data['metadata']['summary'] = event['summary']
+            
+            # The clip is written once its post-event frames have been captured
+            if event.get('clipPath'):
+                event_data['clipPath'] = event['clipPath']
+            
+            # Index the snapshot for "find similar events"
+            if self.similarity_index is not None:
+                with STAGE_SECONDS.labels(camera.camera_id, 'similarity_index').time():
+                    event_data['metadata']['similarityId'] = self.similarity_index.add(
+                        describe(frame, detections),
+                        {key: event_data.get(key) for key in
+                         ('timestamp', 'location', 'eventType', 'description', 'imagePath', 'clipPath')}
+                    )
             
-            if success:
-                logger.info("✅ Event sent to backend successfully")
-            else:
-                logger.error("❌ Failed to send event to backend")
+            # Queue for background delivery to the Node.js API
+            self.event_delivery.submit(event_data, image_bytes)
                 
         except Exception as e:
             logger.error(f"❌ Error handling event: {e}")
@@ -171,30 +592,56 @@ class SurveillanceSystem:
         """Format bounding boxes for API"""
         bounding_boxes = []
         
-        for detection in detections:
+        boxes = detections.boxes.tolist()
+        widths = detections.widths.tolist()
+        heights = detections.heights.tolist()
+        for (x1, y1, _, _), width, height, confidence, class_name in zip(
+                boxes, widths, heights, detections.scores.tolist(), detections.class_names):
             bbox = {
-                'object': detection['class_name'],
-                'confidence': detection['confidence'],
+                'object': class_name,
+                'confidence': confidence,
                 'coordinates': {
-                    'x': detection['bbox']['x1'],
-                    'y': detection['bbox']['y1'],
-                    'width': detection['bbox']['width'],
-                    'height': detection['bbox']['height']
+                    'x': x1,
+                    'y': y1,
+                    'width': width,
+                    'height': height
                 }
             }
             bounding_boxes.append(bbox)
         
         return bounding_boxes
     
-    def display_frame(self, frame):
+    def display_frame(self, camera, frame):
         """Display frame with annotations (optional)"""
-        cv2.imshow('Surveillance Feed', frame)
+        title = 'Surveillance Feed'
+        if len(self.cameras) > 1:
+            title = f'{title} - {camera.location}'
+        cv2.imshow(title, frame)
     
     def cleanup(self):
         """Clean up resources"""
         logger.info("🧹 Cleaning up resources...")
-        self.cap.release()
-        cv2.destroyAllWindows()
+        for camera in self.cameras:
+            logger.info(f"📊 {camera.location} motion gate skip ratio: "
+                        f"{camera.motion_gate.skip_ratio:.1%}, frames skipped by inference: "
+                        f"{camera.inference_slot.dropped}")
+            camera.release()
+        logger.info(f"📊 Events dropped: {self.event_queue.dropped}")
+        logger.info(f"📊 Event delivery: {self.event_delivery.stats()}")
+        self.event_delivery.close()
+        if self.state_store:
+            self.state_store.close(self.snapshot_state())
+        if self.occupancy:
+            self.occupancy.close()
+        if self.clip_writer:
+            self.clip_writer.close()
+        self.image_processor.close()
+        logger.info(f"📊 Image store: {self.image_processor.store.stats()}")
+        if self.live_stream:
+            self.live_stream.stop()
+        self.local_server.stop()
+        if self.display:
+            cv2.destroyAllWindows()
         logger.info("✅ Cleanup completed")
 
 if __name__ == "__main__":
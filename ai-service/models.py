@@ -0,0 +1,142 @@
+import numpy as np
+
+class Detection:
+    """Lightweight view of one row of a DetectionBatch"""
+    __slots__ = ('batch', 'index')
+
+    def __init__(self, batch, index):
+        self.batch = batch
+        self.index = index
+
+    @property
+    def class_id(self):
+        return int(self.batch.class_ids[self.index])
+
+    @property
+    def class_name(self):
+        return self.batch.names[self.class_id]
+
+    @property
+    def confidence(self):
+        return float(self.batch.scores[self.index])
+
+    @property
+    def zone(self):
+        if self.batch.zones is None:
+            return None
+        return self.batch.zones[self.index]
+
+    @property
+    def xyxy(self):
+        return tuple(float(v) for v in self.batch.boxes[self.index])
+
+    @property
+    def bbox(self):
+        """Bounding box in the dict layout used by the rest of the service"""
+        x1, y1, x2, y2 = self.xyxy
+        return {
+            'x1': x1, 'y1': y1,
+            'x2': x2, 'y2': y2,
+            'width': x2 - x1,
+            'height': y2 - y1
+        }
+
+    def __repr__(self):
+        return f"Detection({self.class_name}, {self.confidence:.2f}, {self.xyxy})"
+
+class DetectionBatch:
+    """Columnar detections for one frame: boxes (N, 4), scores (N,), class ids (N,)
+
+    zones optionally holds the ROI zone name of each detection.
+    """
+    __slots__ = ('boxes', 'scores', 'class_ids', 'names', 'zones')
+
+    def __init__(self, boxes, scores, class_ids, names, zones=None):
+        self.boxes = boxes
+        self.scores = scores
+        self.class_ids = class_ids
+        self.names = names
+        self.zones = zones
+
+    @classmethod
+    def empty(cls, names):
+        """Create a batch without detections"""
+        return cls(np.zeros((0, 4), dtype=np.float32),
+                   np.zeros(0, dtype=np.float32),
+                   np.zeros(0, dtype=np.int32),
+                   names)
+
+    @classmethod
+    def from_array(cls, data, names):
+        """Create a batch from an (N, 6) array of x1, y1, x2, y2, score, class"""
+        data = np.asarray(data, dtype=np.float32).reshape(-1, 6)
+        return cls(np.ascontiguousarray(data[:, :4]),
+                   np.ascontiguousarray(data[:, 4]),
+                   data[:, 5].astype(np.int32),
+                   names)
+
+    @classmethod
+    def from_result(cls, result, names):
+        """Create a batch from one YOLO result with a single device-to-host copy"""
+        boxes = result.boxes
+        if boxes is None or len(boxes) == 0:
+            return cls.empty(names)
+        data = boxes.data
+        if hasattr(data, 'cpu'):
+            data = data.cpu().numpy()
+        return cls.from_array(data[:, :6], names)
+
+    @classmethod
+    def concatenate(cls, batches, names):
+        """Join the batches of several crops of one frame"""
+        if not batches:
+            return cls.empty(names)
+        if len(batches) == 1:
+            return batches[0]
+        return cls(np.concatenate([b.boxes for b in batches]),
+                   np.concatenate([b.scores for b in batches]),
+                   np.concatenate([b.class_ids for b in batches]),
+                   names)
+
+    def offset(self, dx, dy):
+        """Return a batch with boxes shifted from crop to full-frame coordinates"""
+        if not dx and not dy:
+            return self
+        shift = np.array([dx, dy, dx, dy], dtype=self.boxes.dtype)
+        return DetectionBatch(self.boxes + shift, self.scores, self.class_ids, self.names, self.zones)
+
+    def __len__(self):
+        return len(self.scores)
+
+    def __iter__(self):
+        for index in range(len(self.scores)):
+            yield Detection(self, index)
+
+    def __getitem__(self, index):
+        return Detection(self, index)
+
+    @property
+    def widths(self):
+        return self.boxes[:, 2] - self.boxes[:, 0]
+
+    @property
+    def heights(self):
+        return self.boxes[:, 3] - self.boxes[:, 1]
+
+    @property
+    def class_names(self):
+        return [self.names[class_id] for class_id in self.class_ids.tolist()]
+
+    def class_mask(self, class_name):
+        """Boolean mask of the detections belonging to a class"""
+        ids = [class_id for class_id, name in self.names.items() if name == class_name]
+        return np.isin(self.class_ids, ids)
+
+    def count(self, class_name):
+        """Number of detections of a class"""
+        return int(np.count_nonzero(self.class_mask(class_name)))
+
+    def select(self, mask):
+        """Return a new batch with the rows selected by a mask or index array"""
+        zones = self.zones[mask] if self.zones is not None else None
+        return DetectionBatch(self.boxes[mask], self.scores[mask], self.class_ids[mask], self.names, zones)
@@ -0,0 +1,94 @@
+import cv2
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+class MotionGate:
+    def __init__(self, enabled=True, fixed_stride=5, min_stride=1, heartbeat_stride=60,
+                 width=160, pixel_threshold=25, area_threshold=0.005, learning_rate=0.05,
+                 analysis_stride=1):
+        """Decide per frame whether the model should run, based on cheap motion analysis
+
+        On motion the stride drops straight to min_stride; while the scene is
+        idle it doubles after every processed frame up to heartbeat_stride.
+        With the gate disabled every fixed_stride-th frame is processed.
+        Motion is measured on every analysis_stride-th frame, so frames in
+        between do not have to be decoded while the scene is idle.
+        """
+        self.enabled = enabled
+        self.fixed_stride = fixed_stride
+        self.min_stride = min_stride
+        self.heartbeat_stride = heartbeat_stride
+        self.width = width
+        self.pixel_threshold = pixel_threshold
+        self.area_threshold = area_threshold
+        self.learning_rate = learning_rate
+        self.analysis_stride = analysis_stride
+
+        self.background = None
+        self.stride = min_stride
+        self.frames_since_inference = 0
+        self.frames_since_analysis = 0
+        self.motion = 0.0
+
+        # Counters
+        self.frames_seen = 0
+        self.frames_passed = 0
+
+    @property
+    def skip_ratio(self):
+        """Fraction of frames the gate kept away from the model"""
+        if not self.frames_seen:
+            return 0.0
+        return 1.0 - self.frames_passed / self.frames_seen
+
+    def wants_frame(self):
+        """True if the next frame has to be decoded for the gate (to analyse or to process)"""
+        if not self.enabled:
+            return (self.frames_seen + 1) % self.fixed_stride == 0
+        return (self.frames_since_inference + 1 >= self.stride
+                or self.frames_since_analysis + 1 >= self.analysis_stride)
+
+    def skip(self):
+        """Account for a frame that was grabbed but never decoded"""
+        self.frames_seen += 1
+        self.frames_since_inference += 1
+        self.frames_since_analysis += 1
+
+    def should_process(self, frame):
+        """Return True if this frame should go to inference"""
+        self.frames_seen += 1
+        self.frames_since_inference += 1
+
+        if not self.enabled:
+            passed = self.frames_seen % self.fixed_stride == 0
+        else:
+            self.motion = self.measure_motion(frame)
+            self.frames_since_analysis = 0
+            if self.motion >= self.area_threshold:
+                self.stride = self.min_stride
+            passed = self.frames_since_inference >= self.stride
+            if passed and self.motion < self.area_threshold:
+                self.stride = min(self.stride * 2, self.heartbeat_stride)
+
+        if passed:
+            self.frames_passed += 1
+            self.frames_since_inference = 0
+        return passed
+
+    def measure_motion(self, frame):
+        """Fraction of pixels that differ from the running background"""
+        height = max(1, frame.shape[0] * self.width // frame.shape[1])
+        small = cv2.resize(frame, (self.width, height), interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        small = cv2.GaussianBlur(small, (5, 5), 0).astype(np.float32)
+
+        if self.background is None or self.background.shape != small.shape:
+            self.background = small
+            return 1.0
+
+        diff = cv2.absdiff(small, self.background)
+        cv2.accumulateWeighted(small, self.background, self.learning_rate)
+        return float(np.count_nonzero(diff > self.pixel_threshold)) / diff.size
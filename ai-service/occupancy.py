@@ -0,0 +1,171 @@
+import os
+import time
+import threading
+import logging
+from collections import deque
+from datetime import datetime
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class _CameraOccupancy:
+    __slots__ = ('heatmap', 'last_seen', 'bucket_start', 'count_sum', 'count_max', 'samples', 'buckets')
+
+    def __init__(self, grid_shape, max_buckets):
+        self.heatmap = np.zeros(grid_shape, dtype=np.float32)
+        self.last_seen = None
+        self.bucket_start = None
+        self.count_sum = 0
+        self.count_max = 0
+        self.samples = 0
+        self.buckets = deque(maxlen=max_buckets)
+
+    def close_bucket(self):
+        """Move the current bucket to the pending series"""
+        if self.samples:
+            self.buckets.append((self.bucket_start, self.count_sum / self.samples, self.count_max, self.samples))
+        self.bucket_start = None
+        self.count_sum = self.count_max = self.samples = 0
+
+class OccupancyRecorder:
+    def __init__(self, path, grid_width=64, bucket_seconds=60, flush_seconds=300, max_gap_seconds=5,
+                 max_pending_buckets=1440, api_client=None):
+        """Per-camera occupancy heatmap and people-count series, accumulated in constant memory
+
+        The heatmap is a downsampled grid of person-seconds at people's foot
+        points; the series holds the mean and peak people count per
+        bucket_seconds. Both are flushed every flush_seconds by a background
+        thread to one .npy heatmap and one CSV series per camera and day,
+        and optionally posted to the backend.
+        """
+        self.path = path
+        self.grid_width = grid_width
+        self.bucket_seconds = bucket_seconds
+        self.flush_seconds = flush_seconds
+        self.max_gap = max_gap_seconds
+        self.max_pending_buckets = max_pending_buckets
+        self.api_client = api_client
+        self.cameras = {}
+        self.locations = {}
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.flushes = 0
+
+    def observe(self, camera, frame_shape, person_boxes, timestamp):
+        """Add one processed frame: (N, 4) xyxy boxes of the people in view at timestamp"""
+        height, width = frame_shape[:2]
+        with self.lock:
+            state = self.cameras.get(camera.camera_id)
+            if state is None:
+                grid_height = max(1, round(self.grid_width * height / width))
+                state = _CameraOccupancy((grid_height, self.grid_width), self.max_pending_buckets)
+                self.cameras[camera.camera_id] = state
+                self.locations[camera.camera_id] = camera.location
+
+            # Weight each frame by the time it stands for, so the frame rate does not bias the map
+            elapsed = 0.0 if state.last_seen is None else min(max(timestamp - state.last_seen, 0.0), self.max_gap)
+            state.last_seen = timestamp
+            if len(person_boxes) and elapsed > 0:
+                grid_height, grid_width = state.heatmap.shape
+                feet_x = (person_boxes[:, 0] + person_boxes[:, 2]) * 0.5
+                cols = np.clip((feet_x * grid_width / width).astype(np.int64), 0, grid_width - 1)
+                rows = np.clip((person_boxes[:, 3] * grid_height / height).astype(np.int64), 0, grid_height - 1)
+                np.add.at(state.heatmap, (rows, cols), elapsed)
+
+            bucket_start = timestamp - timestamp % self.bucket_seconds
+            if state.bucket_start is not None and bucket_start != state.bucket_start:
+                state.close_bucket()
+            state.bucket_start = bucket_start
+            count = len(person_boxes)
+            state.count_sum += count
+            state.count_max = max(state.count_max, count)
+            state.samples += 1
+
+    def start(self):
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, name='occupancy-flush', daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while not self.stop_event.wait(self.flush_seconds):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"❌ Error flushing occupancy: {e}")
+
+    def _take(self, final):
+        """Swap out the accumulated heatmaps and finished buckets under the lock"""
+        now = time.time()
+        taken = {}
+        with self.lock:
+            for camera_id, state in self.cameras.items():
+                if final or (state.bucket_start is not None and now >= state.bucket_start + self.bucket_seconds):
+                    state.close_bucket()
+                heatmap = state.heatmap
+                state.heatmap = np.zeros_like(heatmap)
+                buckets = list(state.buckets)
+                state.buckets.clear()
+                taken[camera_id] = (heatmap, buckets)
+        return taken
+
+    def flush(self, final=False):
+        """Write (and optionally post) everything accumulated since the last flush"""
+        day = datetime.now().strftime('%Y-%m-%d')
+        reports = []
+        for camera_id, (heatmap, buckets) in self._take(final).items():
+            if not buckets and not heatmap.any():
+                continue
+            try:
+                directory = os.path.join(self.path, camera_id)
+                os.makedirs(directory, exist_ok=True)
+                self._add_heatmap(os.path.join(directory, f"{day}-heatmap.npy"), heatmap)
+                self._append_series(directory, buckets)
+            except Exception as e:
+                logger.error(f"❌ Error writing occupancy of {camera_id}: {e}")
+            reports.append({
+                'cameraId': camera_id,
+                'location': self.locations.get(camera_id),
+                'bucketSeconds': self.bucket_seconds,
+                'series': [{'timestamp': datetime.fromtimestamp(start).isoformat(), 'meanPeople': round(mean, 3),
+                            'maxPeople': peak, 'samples': samples} for start, mean, peak, samples in buckets],
+                'heatmap': {'width': heatmap.shape[1], 'height': heatmap.shape[0],
+                            'cells': np.round(heatmap, 2).flatten().tolist()}
+            })
+        self.flushes += 1
+
+        if self.api_client and reports:
+            # Aggregates only: a failed post is logged, not retried
+            self.api_client.send_occupancy(reports)
+
+    def _add_heatmap(self, path, heatmap):
+        """Add a heatmap to the day's file (a grid of person-seconds)"""
+        if os.path.exists(path):
+            saved = np.load(path)
+            if saved.shape == heatmap.shape:
+                heatmap = heatmap + saved
+        temp_path = f"{path}.tmp.npy"
+        np.save(temp_path, heatmap.astype(np.float32))
+        os.replace(temp_path, path)
+
+    def _append_series(self, directory, buckets):
+        """Append buckets to the CSV series of the day each bucket started on"""
+        lines = {}
+        for start, mean, peak, samples in buckets:
+            moment = datetime.fromtimestamp(start)
+            lines.setdefault(moment.strftime('%Y-%m-%d'), []).append(
+                f"{moment.isoformat()},{mean:.3f},{peak},{samples}\n")
+        for day, day_lines in lines.items():
+            path = os.path.join(directory, f"{day}-counts.csv")
+            new_file = not os.path.exists(path)
+            with open(path, 'a', encoding='utf-8') as f:
+                if new_file:
+                    f.write("bucket_start,mean_people,max_people,samples\n")
+                f.writelines(day_lines)
+
+    def close(self):
+        """Stop the flush thread and flush what is left, including the open buckets"""
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=5)
+        self.flush(final=True)
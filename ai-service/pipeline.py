@@ -0,0 +1,60 @@
+import threading
+import logging
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+class LatestFrameSlot:
+    def __init__(self):
+        """Single-item slot that always holds the most recent frame"""
+        self._condition = threading.Condition()
+        self._item = None
+        self.dropped = 0
+
+    def put(self, item):
+        """Store an item, overwriting any item that was not taken yet"""
+        with self._condition:
+            if self._item is not None:
+                self.dropped += 1
+            self._item = item
+            self._condition.notify_all()
+
+    def take(self, timeout=None):
+        """Remove and return the latest item (None if nothing arrived in time)"""
+        with self._condition:
+            if self._item is None:
+                self._condition.wait(timeout)
+            item, self._item = self._item, None
+            return item
+
+class DropOldestQueue:
+    def __init__(self, maxsize, name='queue'):
+        """Bounded FIFO queue that discards its oldest item when full"""
+        self.maxsize = maxsize
+        self.name = name
+        self._items = deque()
+        self._condition = threading.Condition()
+        self.dropped = 0
+
+    def put(self, item):
+        """Append an item without ever blocking the producer"""
+        with self._condition:
+            if len(self._items) >= self.maxsize:
+                self._items.popleft()
+                self.dropped += 1
+                logger.warning(f"⚠️ {self.name} full, dropped oldest item (total dropped: {self.dropped})")
+            self._items.append(item)
+            self._condition.notify()
+
+    def get(self, timeout=None):
+        """Pop the oldest item (None if nothing arrived in time)"""
+        with self._condition:
+            if not self._items:
+                self._condition.wait(timeout)
+            if not self._items:
+                return None
+            return self._items.popleft()
+
+    def __len__(self):
+        with self._condition:
+            return len(self._items)
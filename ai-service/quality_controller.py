@@ -0,0 +1,92 @@
+import time
+import threading
+import logging
+from collections import deque
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+def build_ladder(max_imgsz, min_imgsz, min_stride, max_stride, max_quality, min_quality,
+                 imgsz_step=64, quality_step=15):
+    """Quality levels from best to cheapest: shrink the input first, then skip frames, then lower JPEG quality"""
+    sizes = list(range(max_imgsz, min_imgsz - 1, -imgsz_step)) or [max_imgsz]
+    if sizes[-1] != min_imgsz and min_imgsz < max_imgsz:
+        sizes.append(min_imgsz)
+    ladder = [(imgsz, min_stride, max_quality) for imgsz in sizes]
+    ladder += [(sizes[-1], stride, max_quality) for stride in range(min_stride + 1, max_stride + 1)]
+    quality = max_quality - quality_step
+    while quality > min_quality:
+        ladder.append((sizes[-1], max_stride, quality))
+        quality -= quality_step
+    if max_quality > min_quality:
+        ladder.append((sizes[-1], max_stride, min_quality))
+    return ladder
+
+class QualityController:
+    def __init__(self, ladder, apply, target_ms=300, start_level=0, interval_seconds=5,
+                 min_samples=10, upgrade_ratio=0.6, upgrade_intervals=3):
+        """Keep end-to-end frame latency near a target by stepping along a quality ladder
+
+        Every interval the p90 of the observed latencies is compared with the
+        target: above it the controller steps one level cheaper at once,
+        comfortably below it (upgrade_ratio) for upgrade_intervals in a row
+        it steps one level better. apply(imgsz, stride, jpeg_quality) is
+        called on every change.
+        """
+        self.ladder = ladder
+        self.apply = apply
+        self.target = target_ms / 1000.0
+        self.level = min(max(start_level, 0), len(ladder) - 1)
+        self.interval = interval_seconds
+        self.min_samples = min_samples
+        self.upgrade_ratio = upgrade_ratio
+        self.upgrade_intervals = upgrade_intervals
+
+        self.samples = deque(maxlen=1000)
+        self.lock = threading.Lock()
+        self.next_check = time.monotonic() + interval_seconds
+        self.good_intervals = 0
+        self.adjustments = 0
+        self.apply(*self.ladder[self.level])
+
+    @property
+    def settings(self):
+        return self.ladder[self.level]
+
+    def observe(self, latency):
+        """Record one frame's capture-to-events latency in seconds; may adjust the level"""
+        now = time.monotonic()
+        with self.lock:
+            self.samples.append(latency)
+            if now < self.next_check or len(self.samples) < self.min_samples:
+                return
+            self.next_check = now + self.interval
+            p90 = float(np.percentile(self.samples, 90))
+            self.samples.clear()
+            self._evaluate(p90)
+
+    def _evaluate(self, p90):
+        if p90 > self.target:
+            self.good_intervals = 0
+            if self.level < len(self.ladder) - 1:
+                self._set_level(self.level + 1, p90, 'over')
+            return
+
+        if p90 < self.target * self.upgrade_ratio:
+            self.good_intervals += 1
+            if self.good_intervals >= self.upgrade_intervals and self.level > 0:
+                self.good_intervals = 0
+                self._set_level(self.level - 1, p90, 'well under')
+        else:
+            self.good_intervals = 0
+
+    def _set_level(self, level, p90, relation):
+        old = self.ladder[self.level]
+        arrow = '⬇️' if level > self.level else '⬆️'
+        self.level = level
+        imgsz, stride, quality = self.ladder[level]
+        self.adjustments += 1
+        logger.info(f"{arrow} Quality level {level}/{len(self.ladder) - 1}: p90 latency {p90 * 1000:.0f}ms "
+                    f"{relation} target {self.target * 1000:.0f}ms -> imgsz {old[0]}->{imgsz}, "
+                    f"stride {old[1]}->{stride}, JPEG quality {old[2]}->{quality}")
+        self.apply(imgsz, stride, quality)
@@ -0,0 +1,183 @@
+import os
+import cv2
+import json
+import time
+import threading
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+NUM_CLASSES = 80
+COLOR_BINS = (8, 4, 4)
+ORIENTATION_BINS = 16
+DIMENSIONS = NUM_CLASSES + int(np.prod(COLOR_BINS)) + ORIENTATION_BINS
+
+# Share of the similarity carried by each block (the blocks are unit vectors)
+CLASS_WEIGHT = 0.5
+COLOR_WEIGHT = 0.35
+TEXTURE_WEIGHT = 0.15
+
+def _unit(vector):
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+def describe(frame, detections=None):
+    """Compact descriptor of an event snapshot: class histogram, colour and edge-orientation signature"""
+    classes = np.zeros(NUM_CLASSES, dtype=np.float32)
+    if detections is not None and len(detections):
+        classes += np.bincount(detections.class_ids % NUM_CLASSES, minlength=NUM_CLASSES)
+
+    small = cv2.resize(frame, (64, 48), interpolation=cv2.INTER_AREA)
+    hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV)
+    color = cv2.calcHist([hsv], [0, 1, 2], None, list(COLOR_BINS), [0, 180, 0, 256, 0, 256]).flatten()
+    color = np.sqrt(color)  # Hellinger: damp dominant background colours
+
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY).astype(np.float32)
+    magnitude, angle = cv2.cartToPolar(cv2.Sobel(gray, cv2.CV_32F, 1, 0), cv2.Sobel(gray, cv2.CV_32F, 0, 1))
+    texture = np.bincount((angle.flatten() * ORIENTATION_BINS / (2 * np.pi)).astype(np.int64) % ORIENTATION_BINS,
+                          weights=magnitude.flatten(), minlength=ORIENTATION_BINS)
+
+    descriptor = np.concatenate([
+        _unit(classes) * np.sqrt(CLASS_WEIGHT),
+        _unit(color.astype(np.float32)) * np.sqrt(COLOR_WEIGHT),
+        _unit(texture.astype(np.float32)) * np.sqrt(TEXTURE_WEIGHT),
+    ])
+    return _unit(descriptor).astype(np.float32)
+
+class SimilarityIndex:
+    def __init__(self, path):
+        """Append-only on-disk index of event descriptors with exact top-k cosine search
+
+        vectors.f32 holds one float32 row per event and meta.jsonl one JSON
+        line per event; only the row vectors and line offsets stay in memory.
+        """
+        self.path = path
+        self.vectors_path = os.path.join(path, 'vectors.f32')
+        self.meta_path = os.path.join(path, 'meta.jsonl')
+        self.lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        """Read the index, dropping a half-written last entry"""
+        offsets = []
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, 'rb') as f:
+                position = 0
+                for line in f:
+                    if line.endswith(b'\n'):
+                        offsets.append(position)
+                    position += len(line)
+
+        rows = 0
+        if os.path.exists(self.vectors_path):
+            rows = os.path.getsize(self.vectors_path) // (DIMENSIONS * 4)
+        count = min(rows, len(offsets))
+
+        self.vectors = np.zeros((max(1024, count * 2), DIMENSIONS), dtype=np.float32)
+        if count:
+            self.vectors[:count] = np.fromfile(self.vectors_path, dtype=np.float32,
+                                               count=count * DIMENSIONS).reshape(count, DIMENSIONS)
+        self.offsets = offsets[:count]
+        self.count = count
+
+        # Cut both files back to the entries they agree on
+        with open(self.vectors_path, 'ab') as f:
+            f.truncate(count * DIMENSIONS * 4)
+        meta_size = offsets[count] if count < len(offsets) else (
+            os.path.getsize(self.meta_path) if os.path.exists(self.meta_path) else 0)
+        with open(self.meta_path, 'ab') as f:
+            f.truncate(meta_size)
+        self.meta_size = meta_size
+        logger.info(f"🔎 Similarity index: {count} event(s) in {self.path}")
+
+    def add(self, descriptor, metadata):
+        """Append an event and return its index id"""
+        line = (json.dumps(metadata, default=str) + '\n').encode('utf-8')
+        with self.lock:
+            if self.count == len(self.vectors):
+                grown = np.zeros((len(self.vectors) * 2, DIMENSIONS), dtype=np.float32)
+                grown[:self.count] = self.vectors[:self.count]
+                self.vectors = grown
+            index = self.count
+            with open(self.vectors_path, 'ab') as f:
+                f.write(descriptor.astype(np.float32).tobytes())
+            with open(self.meta_path, 'ab') as f:
+                f.write(line)
+            self.vectors[index] = descriptor
+            self.offsets.append(self.meta_size)
+            self.meta_size += len(line)
+            self.count += 1
+        return index
+
+    def __len__(self):
+        return self.count
+
+    def vector(self, index):
+        with self.lock:
+            if not 0 <= index < self.count:
+                raise KeyError(index)
+            return self.vectors[index].copy()
+
+    def metadata(self, indexes):
+        """Stored metadata of the given ids, read from disk"""
+        with self.lock:
+            offsets = [self.offsets[i] for i in indexes]
+        entries = []
+        with open(self.meta_path, 'rb') as f:
+            for offset in offsets:
+                f.seek(offset)
+                entries.append(json.loads(f.readline()))
+        return entries
+
+    def search(self, descriptor, k=10, exclude=None):
+        """Top-k (id, score) pairs by cosine similarity"""
+        with self.lock:
+            vectors, count = self.vectors, self.count
+        if not count:
+            return []
+        scores = vectors[:count] @ descriptor
+        if exclude is not None and 0 <= exclude < count:
+            scores[exclude] = -np.inf
+        k = min(k, count - (exclude is not None))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(i), float(scores[i])) for i in top]
+
+    def similar_route(self, request):
+        """Serve /similar?id=<index id>&k=10 or /similar?image=<path>&k=10"""
+        start = time.perf_counter()
+        try:
+            k = max(1, min(int(request.query.get('k', 10)), 100))
+            if 'id' in request.query:
+                query_id = int(request.query['id'])
+                results = self.search(self.vector(query_id), k, exclude=query_id)
+            elif 'image' in request.query:
+                frame = cv2.imread(request.query['image'])
+                if frame is None:
+                    raise ValueError(f"Cannot read image {request.query['image']}")
+                results = self.search(describe(frame), k)
+            else:
+                raise ValueError("Pass id=<index id> or image=<path>")
+        except KeyError as e:
+            body, status = {'error': f"Unknown event id {e.args[0]}"}, 404
+        except ValueError as e:
+            body, status = {'error': str(e)}, 400
+        else:
+            entries = self.metadata([i for i, _ in results])
+            body = {
+                'results': [dict(entry, id=i, score=round(score, 4)) for (i, score), entry in zip(results, entries)],
+                'searched': len(self),
+                'tookMs': round((time.perf_counter() - start) * 1000, 2)
+            }
+            status = 200
+
+        data = json.dumps(body).encode('utf-8')
+        request.send_response(status)
+        request.send_header('Content-Type', 'application/json')
+        request.send_header('Content-Length', str(len(data)))
+        request.end_headers()
+        request.wfile.write(data)
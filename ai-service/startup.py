@@ -0,0 +1,53 @@
+import time
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+class StartupProfile:
+    def __init__(self):
+        """Wall-clock duration of each startup phase, for the startup log line and /metrics"""
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.total = None
+        self.lock = threading.Lock()
+        REGISTRY.callback(
+            'surveillance_startup_seconds', 'Time spent in each startup phase (total = until ready)',
+            ('phase',), lambda: [((name,), round(seconds, 4)) for name, seconds in self.breakdown().items()])
+
+    def phase(self, name, function, *args, **kwargs):
+        """Run one startup phase and record how long it took"""
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            with self.lock:
+                self.phases[name] = time.perf_counter() - start
+
+    def concurrently(self, phases):
+        """Run {name: callable} phases on their own threads; results by name
+
+        Every phase is waited for before the first failure is raised, so
+        nothing is left half-initialised in the background.
+        """
+        if not phases:
+            return {}
+        with ThreadPoolExecutor(max_workers=len(phases), thread_name_prefix='startup') as executor:
+            futures = {name: executor.submit(self.phase, name, function) for name, function in phases.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+    def finish(self):
+        """Close the profile and log the breakdown"""
+        self.total = time.perf_counter() - self.started
+        with self.lock:
+            parts = ', '.join(f"{name} {seconds:.2f}s" for name, seconds in self.phases.items())
+        logger.info(f"⏱️ Startup took {self.total:.2f}s ({parts})")
+
+    def breakdown(self):
+        with self.lock:
+            phases = dict(self.phases)
+        if self.total is not None:
+            phases['total'] = self.total
+        return phases
@@ -0,0 +1,80 @@
+import os
+import json
+import time
+import threading
+import logging
+from pipeline import LatestFrameSlot
+
+logger = logging.getLogger(__name__)
+
+class StateStore:
+    def __init__(self, path, interval_seconds=5, max_age_seconds=120):
+        """Periodic snapshot of per-camera tracker and cooldown state for warm restarts
+
+        Snapshots are written atomically by a background thread; only the
+        latest pending one is kept. On restart a snapshot older than
+        max_age_seconds is ignored, since the scene has moved on.
+        """
+        self.path = path
+        self.interval = interval_seconds
+        self.max_age = max_age_seconds
+        self.next_save = time.time() + interval_seconds
+        self.slot = LatestFrameSlot()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.saves = 0
+
+    def load(self):
+        """Saved state by camera id, or {} when missing, unreadable or stale"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Ignoring unreadable state snapshot {self.path}: {e}")
+            return {}
+
+        age = time.time() - snapshot.get('savedAt', 0)
+        if age > self.max_age:
+            logger.info(f"💾 State snapshot is {age:.0f}s old, starting fresh")
+            return {}
+        return snapshot.get('cameras', {})
+
+    def due(self, now):
+        return now >= self.next_save
+
+    def save(self, cameras):
+        """Queue a snapshot ({camera_id: state}) for the writer thread"""
+        self.next_save = time.time() + self.interval
+        self.slot.put({'savedAt': time.time(), 'cameras': cameras})
+
+    def start(self):
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, name='state-snapshots', daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            snapshot = self.slot.take(timeout=0.5)
+            if snapshot is not None:
+                self._write(snapshot)
+
+    def _write(self, snapshot):
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f)
+            os.replace(temp_path, self.path)
+            self.saves += 1
+        except Exception as e:
+            logger.error(f"❌ Error saving state snapshot: {e}")
+
+    def close(self, cameras=None):
+        """Stop the writer, saving a final snapshot when given one"""
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=5)
+        if cameras is not None:
+            self._write({'savedAt': time.time(), 'cameras': cameras})
@@ -0,0 +1,124 @@
+import logging
+import numpy as np
+from models import DetectionBatch
+from tracker import iou_matrix
+
+logger = logging.getLogger(__name__)
+
+def _starts(start, end, tile, step):
+    """Tile start offsets covering [start, end), the last tile flush with the end"""
+    if end - start <= tile:
+        return [start]
+    offsets = list(range(start, end - tile, step))
+    offsets.append(end - tile)
+    return offsets
+
+class TilePlanner:
+    def __init__(self, tile_size=640, overlap=0.2, min_frame_size=1280, full_frame=True, match_threshold=0.5,
+                 iou_threshold=0.5, edge_margin=2):
+        """Slice large frames into overlapping tiles and merge the per-tile detections
+
+        Frames whose longer side is at most min_frame_size are not tiled.
+        With full_frame the whole region is also run once (downscaled by
+        the model) so objects larger than a tile are still found whole.
+        """
+        self.tile_size = tile_size
+        self.overlap = overlap
+        self.min_frame_size = min_frame_size
+        self.full_frame = full_frame
+        self.match_threshold = match_threshold
+        self.iou_threshold = iou_threshold
+        self.edge_margin = edge_margin
+        self._plans = {}
+
+    def plan(self, rects, frame_shape):
+        """Rectangles (x1, y1, x2, y2) to run the model on for these regions of a frame (cached)"""
+        key = (tuple(frame_shape[:2]), tuple(rects))
+        plan = self._plans.get(key)
+        if plan is not None:
+            return plan
+
+        height, width = frame_shape[:2]
+        if max(height, width) <= self.min_frame_size:
+            plan = list(rects)
+        else:
+            step = max(1, int(self.tile_size * (1 - self.overlap)))
+            plan = []
+            for x1, y1, x2, y2 in rects:
+                if x2 - x1 <= self.tile_size and y2 - y1 <= self.tile_size:
+                    plan.append((x1, y1, x2, y2))
+                    continue
+                if self.full_frame:
+                    plan.append((x1, y1, x2, y2))
+                for ty in _starts(y1, y2, self.tile_size, step):
+                    for tx in _starts(x1, x2, self.tile_size, step):
+                        plan.append((tx, ty, min(tx + self.tile_size, x2), min(ty + self.tile_size, y2)))
+            logger.info(f"🧩 Tiling {width}x{height} frames into {len(plan)} model input(s) "
+                        f"of up to {self.tile_size}px")
+        self._plans[key] = plan
+        return plan
+
+    def merge(self, parts, rects, frame_shape):
+        """Join the detections of each model input (parts[i] ran on rects[i]) into one batch
+
+        Frames that were not tiled are concatenated unchanged. On tiled
+        frames only detections of one class from different inputs are
+        matched, greedily by score: pairs above iou_threshold are one object
+        seen twice, and a box cut by an inner tile edge that mostly lies
+        inside another box (intersection over the smaller box) is the same
+        object truncated, so the kept box grows to their union.
+        """
+        names = parts[0].names
+        if len(parts) < 2 or max(frame_shape[:2]) <= self.min_frame_size:
+            return DetectionBatch.concatenate(parts, names)
+
+        detections = DetectionBatch.concatenate(parts, names)
+        count = len(detections)
+        if count < 2:
+            return detections
+
+        sources = np.repeat(np.arange(len(parts)), [len(p) for p in parts])
+        boxes = detections.boxes.astype(np.float32)
+        clipped = self._clipped(boxes, np.array(rects, dtype=np.float32)[sources], frame_shape)
+
+        iou = iou_matrix(boxes, boxes)
+        areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+        union = areas[:, None] + areas[None, :]
+        intersection = iou * union / (1 + iou)
+        ios = intersection / np.maximum(np.minimum(areas[:, None], areas[None, :]), 1e-6)
+        smaller_clipped = np.where(areas[:, None] <= areas[None, :], clipped[:, None], clipped[None, :])
+
+        candidates = (detections.class_ids[:, None] == detections.class_ids[None, :]) & \
+                     (sources[:, None] != sources[None, :])
+        duplicate = candidates & (iou >= self.iou_threshold)
+        truncated = candidates & smaller_clipped & (ios >= self.match_threshold)
+
+        merged = np.zeros(count, dtype=bool)
+        keep = []
+        out_boxes = boxes.copy()
+        for i in np.argsort(-detections.scores).tolist():
+            if merged[i]:
+                continue
+            keep.append(i)
+            merged[i] = True
+            matches = np.flatnonzero(~merged & (duplicate[i] | truncated[i]))
+            merged[matches] = True
+            grown = matches[truncated[i, matches]]
+            if len(grown):
+                group = np.concatenate([[i], grown])
+                out_boxes[i] = [boxes[group, 0].min(), boxes[group, 1].min(),
+                                boxes[group, 2].max(), boxes[group, 3].max()]
+
+        keep = np.array(keep, dtype=np.int64)
+        result = detections.select(keep)
+        result.boxes = out_boxes[keep]
+        return result
+
+    def _clipped(self, boxes, rects, frame_shape):
+        """Boxes touching an edge of their input that is not also an edge of the frame"""
+        height, width = frame_shape[:2]
+        margin = self.edge_margin
+        return (((rects[:, 0] > 0) & (boxes[:, 0] <= rects[:, 0] + margin)) |
+                ((rects[:, 1] > 0) & (boxes[:, 1] <= rects[:, 1] + margin)) |
+                ((rects[:, 2] < width) & (boxes[:, 2] >= rects[:, 2] - margin)) |
+                ((rects[:, 3] < height) & (boxes[:, 3] >= rects[:, 3] - margin)))
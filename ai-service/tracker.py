@@ -0,0 +1,181 @@
+import numpy as np
+import logging
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:  # scipy is optional, fall back to greedy matching
+    linear_sum_assignment = None
+
+logger = logging.getLogger(__name__)
+
+def iou_matrix(boxes_a, boxes_b):
+    """Pairwise IoU between (N, 4) and (M, 4) xyxy boxes"""
+    if len(boxes_a) == 0 or len(boxes_b) == 0:
+        return np.zeros((len(boxes_a), len(boxes_b)), dtype=np.float32)
+    a = boxes_a[:, None, :]
+    b = boxes_b[None, :, :]
+    inter_w = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    inter_h = np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    intersection = inter_w * inter_h
+    area_a = (boxes_a[:, 2] - boxes_a[:, 0]) * (boxes_a[:, 3] - boxes_a[:, 1])
+    area_b = (boxes_b[:, 2] - boxes_b[:, 0]) * (boxes_b[:, 3] - boxes_b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - intersection
+    return intersection / np.maximum(union, 1e-6)
+
+def match(iou, threshold):
+    """Assign rows to columns maximising IoU, ignoring pairs below threshold"""
+    if iou.size == 0:
+        return []
+    if linear_sum_assignment is not None:
+        rows, cols = linear_sum_assignment(-iou)
+        pairs = zip(rows.tolist(), cols.tolist())
+    else:
+        # Greedy: take the best remaining pair first
+        order = np.argsort(-iou, axis=None)
+        rows, cols = np.unravel_index(order, iou.shape)
+        used_rows, used_cols, pairs = set(), set(), []
+        for row, col in zip(rows.tolist(), cols.tolist()):
+            if iou[row, col] < threshold:
+                break
+            if row in used_rows or col in used_cols:
+                continue
+            used_rows.add(row)
+            used_cols.add(col)
+            pairs.append((row, col))
+    return [(row, col) for row, col in pairs if iou[row, col] >= threshold]
+
+class Track:
+    """State of one tracked object"""
+    __slots__ = ('track_id', 'class_id', 'class_name', 'box', 'velocity', 'score', 'zone',
+                 'hits', 'misses', 'first_seen', 'last_seen', 'confirmed', 'flags')
+
+    def __init__(self, track_id, class_id, class_name, box, score, timestamp, zone=None):
+        self.track_id = track_id
+        self.class_id = class_id
+        self.class_name = class_name
+        self.box = box
+        self.velocity = np.zeros(4, dtype=np.float32)
+        self.score = score
+        self.zone = zone
+        self.hits = 1
+        self.misses = 0
+        self.first_seen = timestamp
+        self.last_seen = timestamp
+        self.confirmed = False
+        self.flags = set()  # events already reported for this track
+
+    @property
+    def predicted_box(self):
+        return self.box + self.velocity
+
+    @property
+    def dwell_time(self):
+        return self.last_seen - self.first_seen
+
+    def to_dict(self):
+        return {
+            'trackId': self.track_id, 'classId': self.class_id, 'className': self.class_name,
+            'box': self.box.tolist(), 'velocity': self.velocity.tolist(), 'score': self.score,
+            'zone': self.zone, 'hits': self.hits, 'misses': self.misses, 'firstSeen': self.first_seen,
+            'lastSeen': self.last_seen, 'confirmed': self.confirmed, 'flags': sorted(self.flags)
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        track = cls(data['trackId'], data['classId'], data['className'],
+                    np.array(data['box'], dtype=np.float32), data['score'], data['firstSeen'], data['zone'])
+        track.velocity = np.array(data['velocity'], dtype=np.float32)
+        track.hits = data['hits']
+        track.misses = data['misses']
+        track.last_seen = data['lastSeen']
+        track.confirmed = data['confirmed']
+        track.flags = set(data['flags'])
+        return track
+
+class MultiObjectTracker:
+    def __init__(self, iou_threshold=0.3, min_hits=3, max_misses=5):
+        """Track detections across frames with IoU matching and birth/death hysteresis"""
+        self.iou_threshold = iou_threshold
+        self.min_hits = min_hits
+        self.max_misses = max_misses
+        self.tracks = []
+        self.next_id = 1
+
+    def update(self, detections, timestamp):
+        """Match a DetectionBatch to the tracks
+
+        Returns (born, died): tracks confirmed and confirmed tracks lost in this update.
+        """
+        born, died = [], []
+
+        if self.tracks:
+            predicted = np.array([t.predicted_box for t in self.tracks], dtype=np.float32)
+            track_classes = np.array([t.class_id for t in self.tracks])
+        else:
+            predicted = np.zeros((0, 4), dtype=np.float32)
+            track_classes = np.zeros(0, dtype=np.int32)
+
+        # Only boxes of the same class may be matched
+        iou = iou_matrix(predicted, detections.boxes)
+        iou[track_classes[:, None] != detections.class_ids[None, :]] = 0
+        pairs = match(iou, self.iou_threshold)
+
+        matched_tracks = set()
+        matched_detections = set()
+        for track_index, detection_index in pairs:
+            track = self.tracks[track_index]
+            box = detections.boxes[detection_index]
+            track.velocity = 0.5 * track.velocity + 0.5 * (box - track.box)
+            track.box = box
+            track.score = float(detections.scores[detection_index])
+            if detections.zones is not None:
+                track.zone = detections.zones[detection_index]
+            track.hits += 1
+            track.misses = 0
+            track.last_seen = timestamp
+            if not track.confirmed and track.hits >= self.min_hits:
+                track.confirmed = True
+                born.append(track)
+            matched_tracks.add(track_index)
+            matched_detections.add(detection_index)
+
+        survivors = []
+        for index, track in enumerate(self.tracks):
+            if index not in matched_tracks:
+                track.misses += 1
+                # Tentative tracks die on their first miss, confirmed ones get a grace period
+                if not track.confirmed or track.misses > self.max_misses:
+                    if track.confirmed:
+                        died.append(track)
+                    continue
+            survivors.append(track)
+        self.tracks = survivors
+
+        for index in range(len(detections)):
+            if index in matched_detections:
+                continue
+            class_id = int(detections.class_ids[index])
+            zone = detections.zones[index] if detections.zones is not None else None
+            track = Track(self.next_id, class_id, detections.names[class_id],
+                          detections.boxes[index].copy(), float(detections.scores[index]), timestamp, zone)
+            self.next_id += 1
+            if self.min_hits <= 1:
+                track.confirmed = True
+                born.append(track)
+            self.tracks.append(track)
+
+        return born, died
+
+    def snapshot(self):
+        """JSON-serialisable tracker state"""
+        return {'nextId': self.next_id, 'tracks': [t.to_dict() for t in self.tracks]}
+
+    def restore(self, state):
+        """Continue from a snapshot: same track ids, dwell times and reported flags"""
+        self.tracks = [Track.from_dict(t) for t in state.get('tracks', [])]
+        self.next_id = max(state.get('nextId', 1), self.next_id)
+
+    def confirmed_tracks(self, class_name=None):
+        """Confirmed tracks, optionally restricted to one class"""
+        return [t for t in self.tracks
+                if t.confirmed and (class_name is None or t.class_name == class_name)]
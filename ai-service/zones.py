@@ -0,0 +1,116 @@
+import os
+import json
+import cv2
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Zone:
+    def __init__(self, name, points):
+        """Named polygon region of interest; points in pixels or normalized to 0..1"""
+        self.name = name
+        self.points = np.asarray(points, dtype=np.float32).reshape(-1, 2)
+        self.normalized = bool(self.points.max() <= 1.0)
+
+    def polygon(self, frame_shape):
+        """Polygon vertices in pixel coordinates for a frame shape"""
+        if self.normalized:
+            height, width = frame_shape[:2]
+            return np.round(self.points * [width, height]).astype(np.int32)
+        return np.round(self.points).astype(np.int32)
+
+class ZoneSet:
+    def __init__(self, zones, padding=16, full_frame_ratio=0.8):
+        """The zones of one camera, with crop planning and detection filtering"""
+        self.zones = zones
+        self.padding = padding
+        self.full_frame_ratio = full_frame_ratio
+        self._shape = None
+        self._labels = None
+        self._crops = None
+
+    def _prepare(self, frame_shape):
+        """Build the zone label image and crop rectangles for a frame size (cached)"""
+        shape = tuple(frame_shape[:2])
+        if shape == self._shape:
+            return
+        height, width = shape
+
+        # 0 = outside every zone, i + 1 = inside zone i (earlier zones win overlaps)
+        labels = np.zeros(shape, dtype=np.uint8)
+        rects = []
+        for index in reversed(range(len(self.zones))):
+            polygon = self.zones[index].polygon(frame_shape)
+            cv2.fillPoly(labels, [polygon], index + 1)
+            x, y, w, h = cv2.boundingRect(polygon)
+            rects.append([max(0, x - self.padding), max(0, y - self.padding),
+                          min(width, x + w + self.padding), min(height, y + h + self.padding)])
+
+        self._shape = shape
+        self._labels = labels
+        self._crops = self._merge_rects(rects, width, height)
+
+    def _merge_rects(self, rects, width, height):
+        """Merge overlapping rectangles; fall back to the full frame if crops barely save anything"""
+        merged = True
+        while merged:
+            merged = False
+            for i in range(len(rects)):
+                for j in range(i + 1, len(rects)):
+                    a, b = rects[i], rects[j]
+                    if a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]:
+                        rects[i] = [min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])]
+                        del rects[j]
+                        merged = True
+                        break
+                if merged:
+                    break
+
+        area = sum((x2 - x1) * (y2 - y1) for x1, y1, x2, y2 in rects)
+        if area >= self.full_frame_ratio * width * height:
+            return [(0, 0, width, height)]
+        return [tuple(rect) for rect in rects]
+
+    def crops(self, frame_shape):
+        """Crop rectangles (x1, y1, x2, y2) that cover every zone"""
+        self._prepare(frame_shape)
+        return self._crops
+
+    def assign(self, detections, frame_shape):
+        """Keep detections anchored inside a zone and tag them with its name"""
+        self._prepare(frame_shape)
+
+        # People are anchored at their feet, objects at their centre
+        boxes = detections.boxes
+        anchor_x = (boxes[:, 0] + boxes[:, 2]) / 2
+        anchor_y = np.where(detections.class_mask('person'), boxes[:, 3] - 1, (boxes[:, 1] + boxes[:, 3]) / 2)
+        xs = np.clip(anchor_x.astype(np.int32), 0, self._shape[1] - 1)
+        ys = np.clip(anchor_y.astype(np.int32), 0, self._shape[0] - 1)
+        labels = self._labels[ys, xs]
+
+        inside = labels > 0
+        kept = detections.select(inside)
+        names = np.array([zone.name for zone in self.zones], dtype=object)
+        kept.zones = names[labels[inside].astype(np.int64) - 1]
+        return kept
+
+def load_zones(path):
+    """Load {camera_id: {zone_name: [[x, y], ...]}} from a JSON file or inline JSON string"""
+    if not path:
+        return {}
+    try:
+        if os.path.exists(path):
+            with open(path) as f:
+                config = json.load(f)
+        else:
+            config = json.loads(path)
+    except Exception as e:
+        logger.error(f"❌ Error loading ROI zones: {e}")
+        return {}
+
+    zone_sets = {}
+    for camera_id, zones in config.items():
+        zone_sets[camera_id] = ZoneSet([Zone(name, points) for name, points in zones.items()])
+        logger.info(f"🗺️ {camera_id}: {len(zones)} ROI zone(s) ({', '.join(zones)})")
+    return zone_sets
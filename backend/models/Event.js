@@ -31,6 +31,14 @@ const EventSchema = new mongoose.Schema({
     type: String,
     required: false
   },
+  clipPath: {
+    type: String, // pre/post-event video clip written by the AI service
+    required: false
+  },
+  deliveryId: {
+    type: String, // set by the AI service so a retried batch is not saved twice
+    required: false
+  },
   boundingBoxes: [{
     object: {
       type: String,
@@ -60,6 +68,25 @@ const EventSchema = new mongoose.Schema({
     cameraId: {
       type: String,
       default: 'cam-001'
+    },
+    zone: {
+      type: String, // ROI zone name(s) the event occurred in
+      required: false
+    },
+    similarityId: {
+      type: Number, // row of this event in the AI service's similarity index (/similar?id=)
+      required: false
+    },
+    summary: {
+      // Present when the AI service merged a burst of events into this one
+      eventCount: Number,
+      eventCounts: {
+        type: Map,
+        of: Number
+      },
+      firstSeen: Date,
+      lastSeen: Date,
+      peakPeople: Number
     }
   },
   processed: {
@@ -75,6 +102,7 @@ EventSchema.index({ timestamp: -1 });
 EventSchema.index({ eventType: 1 });
 EventSchema.index({ location: 1 });
 EventSchema.index({ 'metadata.cameraId': 1 });
+EventSchema.index({ deliveryId: 1 }, { unique: true, sparse: true });
 
 // Methods
 EventSchema.methods.generateSummary = function() {
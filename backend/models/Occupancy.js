@@ -0,0 +1,37 @@
+const mongoose = require('mongoose');
+
+// One flush of the Python service's occupancy analytics for one camera:
+// the people-count buckets finished since the previous flush and the
+// heatmap (person-seconds per grid cell) accumulated over the same period
+const OccupancySchema = new mongoose.Schema({
+  cameraId: {
+    type: String,
+    required: true
+  },
+  location: String,
+  timestamp: {
+    type: Date,
+    default: Date.now
+  },
+  bucketSeconds: {
+    type: Number,
+    default: 60
+  },
+  series: [{
+    timestamp: Date,
+    meanPeople: Number,
+    maxPeople: Number,
+    samples: Number
+  }],
+  heatmap: {
+    width: Number,
+    height: Number,
+    cells: [Number]
+  }
+}, {
+  timestamps: true
+});
+
+OccupancySchema.index({ cameraId: 1, timestamp: -1 });
+
+module.exports = mongoose.model('Occupancy', OccupancySchema);
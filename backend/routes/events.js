@@ -25,6 +25,9 @@ const storage = multer.diskStorage({
 
 const upload = multer({ storage: storage });
 
+// Batches from the Python service carry raw JPEG parts kept in memory
+const batchUpload = multer({ storage: multer.memoryStorage() });
+
 // GET /api/events - Fetch all events with pagination and filtering
 router.get('/', async (req, res) => {
   try {
@@ -155,50 +158,121 @@ router.post('/', upload.single('image'), async (req, res) => {
   }
 });
 
+// Helper - Save one event posted by the Python AI service
+// Returns { event, duplicate }: an event whose deliveryId was already saved
+// (a retried batch) is returned as is, without a new image or emit
+async function saveEventFromPython(body, io, imageBuffer = null) {
+  const {
+    timestamp,
+    location,
+    eventType,
+    description,
+    confidence,
+    boundingBoxes,
+    metadata,
+    imageBase64,
+    clipPath,
+    deliveryId
+  } = body;
+
+  if (deliveryId) {
+    const existing = await Event.findOne({ deliveryId });
+    if (existing) return { event: existing, duplicate: true };
+  }
+
+  let imageUrl = null;
+  let fullPath = null;
+
+  if (!imageBuffer && imageBase64) {
+    imageBuffer = Buffer.from(imageBase64, 'base64');
+  }
+
+  if (imageBuffer) {
+    const uploadsDir = path.join(__dirname, '../uploads/events');
+    if (!fs.existsSync(uploadsDir)) {
+      fs.mkdirSync(uploadsDir, { recursive: true });
+    }
+
+    const filename = `event_${Date.now()}_${eventType}.jpg`;
+    fullPath = path.join(uploadsDir, filename);
+    fs.writeFileSync(fullPath, imageBuffer);
+    imageUrl = `/uploads/events/${filename}`;
+  }
+
+  const event = new Event({
+    timestamp: timestamp ? new Date(timestamp) : new Date(),
+    location,
+    eventType,
+    description,
+    confidence,
+    boundingBoxes: boundingBoxes || [],
+    metadata: metadata || {},
+    imageUrl,
+    clipPath,
+    deliveryId
+  });
+
+  let savedEvent;
+  try {
+    savedEvent = await event.save();
+  } catch (error) {
+    // A concurrent retry saved the same event first
+    if (error.code !== 11000 || !deliveryId) throw error;
+    if (fullPath) fs.unlink(fullPath, () => {});
+    return { event: await Event.findOne({ deliveryId }), duplicate: true };
+  }
+  io.emit('new-event', { event: savedEvent, message: 'AI Detection: ' + description });
+  return { event: savedEvent, duplicate: false };
+}
+
 // POST /api/events/from-python
 router.post('/from-python', async (req, res) => {
   try {
-    const {
-      timestamp,
-      location,
-      eventType,
-      description,
-      confidence,
-      boundingBoxes,
-      metadata,
-      imageBase64
-    } = req.body;
-
-    let imageUrl = null;
-
-    if (imageBase64) {
-      const uploadsDir = path.join(__dirname, '../uploads/events');
-      if (!fs.existsSync(uploadsDir)) {
-        fs.mkdirSync(uploadsDir, { recursive: true });
-      }
+    const { event } = await saveEventFromPython(req.body, req.app.get('io'));
+    res.status(200).json({ success: true, message: 'Event received', eventId: event._id });
+  } catch (error) {
+    res.status(500).json({ success: false, error: error.message });
+  }
+});
 
-      const filename = `event_${Date.now()}_${eventType}.jpg`;
-      const fullPath = path.join(uploadsDir, filename);
-      fs.writeFileSync(fullPath, Buffer.from(imageBase64, 'base64'));
-      imageUrl = `/uploads/events/${filename}`;
+// POST /api/events/from-python/batch - Several events in submission order
+// Accepts JSON ({ events: [...] }) or multipart with an `events` JSON part
+// and one binary image part per event, referenced by its `imageField`
+router.post('/from-python/batch', batchUpload.any(), async (req, res) => {
+  try {
+    let { events } = req.body;
+    if (typeof events === 'string') {
+      try {
+        events = JSON.parse(events);
+      } catch (error) {
+        events = null;
+      }
     }
+    if (!Array.isArray(events)) return res.status(400).json({ success: false, error: 'events array is required' });
 
-    const event = new Event({
-      timestamp: timestamp ? new Date(timestamp) : new Date(),
-      location,
-      eventType,
-      description,
-      confidence,
-      boundingBoxes: boundingBoxes || [],
-      metadata: metadata || {},
-      imageUrl
-    });
+    const images = {};
+    for (const file of req.files || []) {
+      images[file.fieldname] = file.buffer;
+    }
 
-    const savedEvent = await event.save();
+    // Save sequentially so events keep their order. An invalid event is
+    // reported but must not make the client retry the whole batch; any
+    // other failure (e.g. the database is down) fails the request with a
+    // 5xx so the client keeps the batch spooled and retries it later;
+    // events saved before the failure are recognized by their deliveryId
     const io = req.app.get('io');
-    io.emit('new-event', { event: savedEvent, message: 'AI Detection: ' + description });
+    const results = [];
+    for (const body of events) {
+      try {
+        const { event, duplicate } = await saveEventFromPython(body, io, images[body.imageField]);
+        results.push({ success: true, eventId: event._id, duplicate });
+      } catch (error) {
+        if (error.name !== 'ValidationError' && error.name !== 'CastError') throw error;
+        results.push({ success: false, error: error.message });
+      }
+    }
 
-    res.status(200).json({ success: true, message: 'Event received', eventId: savedEvent._id });
+    res.status(200).json({ success: true, message: `${events.length} events received`, results });
   } catch (error) {
     res.status(500).json({ success: false, error: error.message });
   }
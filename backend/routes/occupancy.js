@@ -0,0 +1,72 @@
+// backend/routes/occupancy.js
+const express = require('express');
+const router = express.Router();
+const Occupancy = require('../models/Occupancy');
+
+// POST /api/occupancy/from-python - Occupancy reports flushed by the Python service
+router.post('/from-python', async (req, res) => {
+  try {
+    const { reports } = req.body;
+    if (!Array.isArray(reports)) return res.status(400).json({ success: false, error: 'reports array is required' });
+
+    const saved = await Occupancy.insertMany(reports.map(report => ({
+      cameraId: report.cameraId,
+      location: report.location,
+      bucketSeconds: report.bucketSeconds,
+      series: report.series || [],
+      heatmap: report.heatmap
+    })));
+
+    res.status(200).json({ success: true, message: `${saved.length} occupancy reports received` });
+  } catch (error) {
+    res.status(500).json({ success: false, error: error.message });
+  }
+});
+
+// GET /api/occupancy?cameraId=cam-000&startTime=...&endTime=...
+// People-count series and summed heatmap of one camera (default: last 24 hours)
+router.get('/', async (req, res) => {
+  try {
+    const { cameraId } = req.query;
+    if (!cameraId) return res.status(400).json({ success: false, error: 'cameraId is required' });
+
+    const endTime = req.query.endTime ? new Date(req.query.endTime) : new Date();
+    const startTime = req.query.startTime ? new Date(req.query.startTime) : new Date(endTime - 24 * 60 * 60 * 1000);
+
+    const reports = await Occupancy.find({
+      cameraId,
+      timestamp: { $gte: startTime, $lte: endTime }
+    }).sort({ timestamp: 1 });
+
+    const series = [];
+    let heatmap = null;
+    reports.forEach(report => {
+      report.series.forEach(bucket => {
+        if (bucket.timestamp >= startTime && bucket.timestamp <= endTime) series.push(bucket);
+      });
+
+      const cells = report.heatmap && report.heatmap.cells;
+      if (!cells || !cells.length) return;
+      if (!heatmap) {
+        heatmap = { width: report.heatmap.width, height: report.heatmap.height, cells: new Array(cells.length).fill(0) };
+      }
+      // Grids of another size (a changed camera resolution or grid setting) cannot be added up
+      if (cells.length !== heatmap.cells.length) return;
+      cells.forEach((value, index) => { heatmap.cells[index] += value; });
+    });
+
+    res.json({
+      success: true,
+      cameraId,
+      startTime,
+      endTime,
+      series,
+      heatmap,
+      peakPeople: series.reduce((peak, bucket) => Math.max(peak, bucket.maxPeople || 0), 0)
+    });
+  } catch (error) {
+    res.status(500).json({ success: false, error: error.message });
+  }
+});
+
+module.exports = router;
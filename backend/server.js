@@ -29,6 +29,7 @@ app.use('/uploads', express.static('uploads'));
 app.use('/api/events', require('./routes/events'));
 app.use('/api/reports', require('./routes/reports'));
 app.use('/api/images', require('./routes/images'));
+app.use('/api/occupancy', require('./routes/occupancy'));
 
 // Test route
 app.get('/', (req, res) => {